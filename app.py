@@ -1,56 +1,116 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
+from flask import Flask, Blueprint, abort, current_app, render_template, request, jsonify, session, redirect, url_for, make_response, send_from_directory
 from flask_cors import CORS
-import sqlite3
-from datetime import datetime
+import hashlib
 import os
+import threading
 from dotenv import load_dotenv
-from openai import OpenAI
-from authlib.integrations.flask_client import OAuth
 from functools import wraps
 import json
 from werkzeug.middleware.proxy_fix import ProxyFix
+import audio
+import backfill
+import compression
+import db
+import metrics
+import phonetic_search
+import phonetics
+import ratelimit
+import writebehind
+from db import GLOBAL_SCOPE, WORD_COLUMNS, bump_data_version, get_data_version, get_db, insert_words, remove_words
 
 # Load environment variables
 load_dotenv()
 
-app = Flask(__name__, static_folder='.', static_url_path='')
-app.secret_key = os.getenv('SECRET_KEY')
-
-# Fix for ngrok/proxy - makes Flask aware it's behind a reverse proxy
-app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
-
-# Configure CORS
-CORS(app, supports_credentials=True, origins=[
-    f"https://{os.getenv('NGROK_DOMAIN')}",
-    "http://localhost:5000",
-    "http://127.0.0.1:5000"
-])
-
-# Initialize OAuth
-oauth = OAuth(app)
-auth0 = oauth.register(
-    'auth0',
-    client_id=os.getenv('AUTH0_CLIENT_ID'),
-    client_secret=os.getenv('AUTH0_CLIENT_SECRET'),
-    api_base_url=f"https://{os.getenv('AUTH0_DOMAIN')}",
-    access_token_url=f"https://{os.getenv('AUTH0_DOMAIN')}/oauth/token",
-    authorize_url=f"https://{os.getenv('AUTH0_DOMAIN')}/authorize",
-    server_metadata_url=f"https://{os.getenv('AUTH0_DOMAIN')}/.well-known/openid-configuration",
-    client_kwargs={
-        'scope': 'openid profile email',
-    },
-)
-
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-
-DATABASE = 'arabicwriter.db'
-
-def get_db():
-    """Get database connection"""
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
+bp = Blueprint('main', __name__)
+
+# Per-user/global rate limits and in-flight cap for OpenAI calls
+llm_budget = ratelimit.LLMBudget.from_env()
+
+TRANSLATION_MODEL = 'gpt-4o-mini'
+
+# Larger deltas make the client reload the page instead
+MAX_SYNC_CHANGES = 100
+
+# Most results /api/words/similar returns
+MAX_SIMILAR_WORDS = 50
+
+# Guards lazy creation of the OpenAI and Auth0 clients
+_clients_lock = threading.Lock()
+
+def create_app():
+    """Create and configure the Flask app
+
+    Nothing here touches the database or the network; run
+    `flask --app app init-db` once per deploy to create/migrate the schema.
+    """
+    app = Flask(__name__, static_folder='.', static_url_path='')
+    app.secret_key = os.getenv('SECRET_KEY')
+
+    # Fix for ngrok/proxy - makes Flask aware it's behind a reverse proxy
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
+
+    # Configure CORS
+    CORS(app, supports_credentials=True, origins=[
+        f"https://{os.getenv('NGROK_DOMAIN')}",
+        "http://localhost:5000",
+        "http://127.0.0.1:5000"
+    ])
+
+    # Compress JSON responses and serve precompressed static assets
+    compression.init_app(app)
+
+    # Route, OpenAI and SQLite timings at /metrics
+    metrics.init_app(app)
+
+    # flask init-db / flask backfill-phonemes
+    db.init_app(app)
+    backfill.init_app(app)
+
+    # Load testing only: lets bench/loadtest.py sign in without Auth0
+    if os.getenv('ENABLE_TEST_LOGIN') == '1':
+        print('WARNING: /_test/login is enabled, never set ENABLE_TEST_LOGIN in production')
+        app.add_url_rule('/_test/login', 'test_login', test_login, methods=['POST'])
+
+    app.register_blueprint(bp)
+    return app
+
+def get_openai():
+    """Get the OpenAI client, creating it on first use"""
+    client = current_app.extensions.get('openai')
+    if client is None:
+        with _clients_lock:
+            client = current_app.extensions.get('openai')
+            if client is None:
+                from openai import OpenAI
+                # Bounded so a call never outlives its rate-limit slot
+                client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'), timeout=ratelimit.LLM_CALL_TIMEOUT,
+                                max_retries=ratelimit.LLM_MAX_RETRIES)
+                current_app.extensions['openai'] = client
+    return client
+
+def get_auth0():
+    """Get the Auth0 OAuth client, registering it on first use"""
+    auth0 = current_app.extensions.get('auth0')
+    if auth0 is None:
+        with _clients_lock:
+            auth0 = current_app.extensions.get('auth0')
+            if auth0 is None:
+                from authlib.integrations.flask_client import OAuth
+                oauth = OAuth(current_app._get_current_object())
+                auth0 = oauth.register(
+                    'auth0',
+                    client_id=os.getenv('AUTH0_CLIENT_ID'),
+                    client_secret=os.getenv('AUTH0_CLIENT_SECRET'),
+                    api_base_url=f"https://{os.getenv('AUTH0_DOMAIN')}",
+                    access_token_url=f"https://{os.getenv('AUTH0_DOMAIN')}/oauth/token",
+                    authorize_url=f"https://{os.getenv('AUTH0_DOMAIN')}/authorize",
+                    server_metadata_url=f"https://{os.getenv('AUTH0_DOMAIN')}/.well-known/openid-configuration",
+                    client_kwargs={
+                        'scope': 'openid profile email',
+                    },
+                )
+                current_app.extensions['auth0'] = auth0
+    return auth0
 
 def requires_auth(f):
     """Decorator to require authentication"""
@@ -67,66 +127,69 @@ def get_user_id():
         return session['user'].get('sub', 'anonymous')
     return 'anonymous'
 
-def init_db():
-    """Initialize the database"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    # Check if table exists
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='arabic_words'")
-    table_exists = cursor.fetchone()
-    
-    if table_exists:
-        # Check and add missing columns
-        cursor.execute("PRAGMA table_info(arabic_words)")
-        columns = [col[1] for col in cursor.fetchall()]
-        
-        if 'translation' not in columns:
-            print('Adding translation column...')
-            cursor.execute('ALTER TABLE arabic_words ADD COLUMN translation TEXT')
-        if 'phonetic' not in columns:
-            print('Adding phonetic column...')
-            cursor.execute('ALTER TABLE arabic_words ADD COLUMN phonetic TEXT')
-        if 'sentence' not in columns:
-            print('Adding sentence column...')
-            cursor.execute('ALTER TABLE arabic_words ADD COLUMN sentence TEXT')
-        if 'arabic_sentence' not in columns:
-            print('Adding arabic_sentence column...')
-            cursor.execute('ALTER TABLE arabic_words ADD COLUMN arabic_sentence TEXT')
-        if 'user_id' not in columns:
-            print('Adding user_id column...')
-            cursor.execute('ALTER TABLE arabic_words ADD COLUMN user_id TEXT')
-        conn.commit()
-    else:
-        # Create table with all columns
-        cursor.execute('''
-            CREATE TABLE arabic_words (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                word TEXT NOT NULL,
-                translation TEXT,
-                phonetic TEXT,
-                sentence TEXT,
-                arabic_sentence TEXT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                session_id TEXT,
-                user_id TEXT
-            )
-        ''')
-        conn.commit()
-    
-    conn.close()
-    print('Database initialized')
+def queue_pronunciations(texts):
+    """Pre-render audio for Arabic texts in the background"""
+    worker = audio.get_worker()
+    for arabic in texts:
+        if len(arabic or '') > audio.MAX_TEXT_LENGTH:
+            continue
+        token_ids = phonetics.arabic_token_ids(arabic or '')
+        if token_ids:
+            try:
+                worker.submit(token_ids)
+            except audio.QueueFull:
+                # Rendered on demand by /api/audio once the backlog clears
+                return
+
+def conditional(scope_func):
+    """Decorator adding ETag/Last-Modified validation based on a data version
+
+    The version is read before the view runs, so an unchanged scope is
+    answered with 304 without touching the word tables at all.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            scope = scope_func()
+            version, updated_at = get_data_version(scope)
+
+            # Responses differ per user and per query string
+            key = f"{scope}|{version}|{request.path}|{sorted(request.args.items(multi=True))}"
+            etag = hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]
 
-# Initialize database on startup
-init_db()
+            if request.if_none_match:
+                unchanged = request.if_none_match.contains_weak(etag)
+            else:
+                unchanged = bool(updated_at and request.if_modified_since
+                                 and updated_at <= request.if_modified_since)
 
-@app.route('/')
+            response = make_response('', 304) if unchanged else make_response(f(*args, **kwargs))
+            if response.status_code in (200, 304):
+                response.set_etag(etag, weak=True)
+                if updated_at:
+                    response.last_modified = updated_at
+                response.cache_control.private = True
+                response.cache_control.no_cache = True
+            return response
+        return decorated
+    return decorator
+
+@bp.route('/')
 def index():
-    """Serve the main page"""
-    return app.send_static_file('index.html')
+    """Serve the main page with content-versioned asset URLs"""
+    static_folder = current_app.static_folder
+    with open(os.path.join(static_folder, 'index.html'), encoding='utf-8') as f:
+        html = f.read()
+    for asset in ('styles.css', 'script.js'):
+        version = compression.asset_version(static_folder, asset)
+        html = html.replace(f'"{asset}"', f'"{asset}?v={version}"')
+    
+    response = make_response(html)
+    response.cache_control.no_cache = True
+    return response
 
 # Auth0 routes
-@app.route('/login')
+@bp.route('/login')
 def login():
     """Redirect to Auth0 login"""
     try:
@@ -135,23 +198,23 @@ def login():
         if ngrok_domain:
             redirect_uri = f"https://{ngrok_domain}/callback"
         else:
-            redirect_uri = url_for('callback', _external=True, _scheme='https')
+            redirect_uri = url_for('.callback', _external=True, _scheme='https')
         
         print(f"Login redirect URI: {redirect_uri}")
         print(f"Auth0 Domain: {os.getenv('AUTH0_DOMAIN')}")
         print(f"Client ID: {os.getenv('AUTH0_CLIENT_ID')}")
         
-        return auth0.authorize_redirect(redirect_uri=redirect_uri)
+        return get_auth0().authorize_redirect(redirect_uri=redirect_uri)
     except Exception as e:
         print(f"Login error: {e}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/callback')
+@bp.route('/callback')
 def callback():
     """Handle Auth0 callback"""
     try:
         print("Callback received")
-        token = auth0.authorize_access_token()
+        token = get_auth0().authorize_access_token()
         print(f"Token received: {token.get('userinfo', {})}")
         session['user'] = token['userinfo']
         return redirect('/')
@@ -159,17 +222,31 @@ def callback():
         print(f"Callback error: {e}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/logout')
+@bp.route('/logout')
 def logout():
     """Logout user"""
     session.clear()
     return redirect(
         f"https://{os.getenv('AUTH0_DOMAIN')}/v2/logout?"
-        + f"returnTo={url_for('index', _external=True, _scheme='https')}&"
+        + f"returnTo={url_for('.index', _external=True, _scheme='https')}&"
         + f"client_id={os.getenv('AUTH0_CLIENT_ID')}"
     )
 
-@app.route('/api/user')
+def test_login():
+    """Put a fake user in the session (only routed when ENABLE_TEST_LOGIN=1)"""
+    data = request.json or {}
+    sub = data.get('sub', '').strip()
+    if not sub:
+        return jsonify({'error': 'No sub provided'}), 400
+    
+    session['user'] = {
+        'sub': sub,
+        'name': data.get('name', sub),
+        'email': data.get('email', f'{sub}@loadtest.invalid')
+    }
+    return jsonify({'success': True, 'user': session['user']})
+
+@bp.route('/api/user')
 def get_user():
     """Get current user info"""
     if 'user' in session:
@@ -179,8 +256,9 @@ def get_user():
         })
     return jsonify({'authenticated': False})
 
-@app.route('/api/translate', methods=['POST'])
+@bp.route('/api/translate', methods=['POST'])
 @requires_auth
+@llm_budget.limit(get_user_id)
 def translate_word():
     """Translate Arabic word to English using OpenAI"""
     data = request.json
@@ -190,15 +268,17 @@ def translate_word():
         return jsonify({'error': 'No word provided'}), 400
     
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a translator. Respond ONLY with valid JSON in this exact format: {\"english\": \"word\", \"phonetic\": \"pronunciation\", \"sentence\": \"example sentence\", \"arabic_sentence\": \"arabic example sentence\"}. No other text."},
-                {"role": "user", "content": f"For the Arabic word '{arabic_word}', provide: 1) English translation (one word), 2) phonetic transliteration, 3) one simple example sentence using the word in English, 4) the same example sentence in Arabic."}
-            ],
-            max_tokens=200,
-            temperature=0.3
-        )
+        with metrics.openai_call(TRANSLATION_MODEL):
+            response = get_openai().chat.completions.create(
+                model=TRANSLATION_MODEL,
+                messages=[
+                    {"role": "system", "content": "You are a translator. Respond ONLY with valid JSON in this exact format: {\"english\": \"word\", \"phonetic\": \"pronunciation\", \"sentence\": \"example sentence\", \"arabic_sentence\": \"arabic example sentence\"}. No other text."},
+                    {"role": "user", "content": f"For the Arabic word '{arabic_word}', provide: 1) English translation (one word), 2) phonetic transliteration, 3) one simple example sentence using the word in English, 4) the same example sentence in Arabic."}
+                ],
+                max_tokens=200,
+                temperature=0.3
+            )
+        metrics.record_openai_usage(TRANSLATION_MODEL, response)
         
         import json
         result = json.loads(response.choices[0].message.content.strip())
@@ -215,7 +295,7 @@ def translate_word():
         print(f"Translation error: {e}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/words', methods=['POST'])
+@bp.route('/api/words', methods=['POST'])
 @requires_auth
 def save_words():
     """Save words to database"""
@@ -227,23 +307,27 @@ def save_words():
     if not words_data:
         return jsonify({'error': 'No words provided'}), 400
     
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    for item in words_data:
-        word = item.get('word', '').strip()
-        translation = item.get('translation', '')
-        phonetic = item.get('phonetic', '')
-        sentence = item.get('sentence', '')
-        arabic_sentence = item.get('arabic_sentence', '')
-        if word:
-            cursor.execute(
-                'INSERT INTO arabic_words (word, translation, phonetic, sentence, arabic_sentence, session_id, user_id) VALUES (?, ?, ?, ?, ?, ?, ?)',
-                (word, translation, phonetic, sentence, arabic_sentence, session_id, user_id)
-            )
+    if writebehind.enabled():
+        # Group commit: returns once the batch holding these rows is committed
+        try:
+            writebehind.get_queue().submit(user_id, session_id, words_data)
+        except writebehind.CommitTimeout:
+            return jsonify({'error': 'Saving is taking too long, please retry'}), 503
+        except Exception as e:
+            print(f"Save error: {e}")
+            return jsonify({'error': str(e)}), 500
+    else:
+        conn = get_db()
+        cursor = conn.cursor()
+        versions = bump_data_version(cursor, [user_id])
+        insert_words(cursor, user_id, session_id, words_data, versions[user_id])
+        conn.commit()
+        conn.close()
     
-    conn.commit()
-    conn.close()
+    queue_pronunciations(
+        arabic for item in words_data
+        for arabic in (item.get('word', '').strip(), item.get('arabic_sentence', ''))
+    )
     
     return jsonify({
         'success': True,
@@ -251,8 +335,9 @@ def save_words():
         'count': len(words_data)
     })
 
-@app.route('/api/words', methods=['GET'])
+@bp.route('/api/words', methods=['GET'])
 @requires_auth
+@conditional(get_user_id)
 def get_words():
     """Get words from database with pagination and search"""
     session_id = request.args.get('sessionId')
@@ -264,19 +349,27 @@ def get_words():
     conn = get_db()
     cursor = conn.cursor()
     
+    # One read transaction, so the version matches the rows and the total;
+    # read first so /api/words/changes?since=version misses nothing
+    cursor.execute('BEGIN')
+    cursor.execute('SELECT version FROM data_versions WHERE scope = ?', (user_id,))
+    row = cursor.fetchone()
+    version = row['version'] if row else 0
+    
     # Build query with filters - only get current user's words
-    query = 'SELECT * FROM arabic_words WHERE user_id = ?'
-    count_query = 'SELECT COUNT(*) as total FROM arabic_words WHERE user_id = ?'
+    joins = ' FROM arabic_words w JOIN lexicon l ON l.id = w.lexicon_id WHERE w.user_id = ?'
+    query = f'SELECT {WORD_COLUMNS}' + joins
+    count_query = 'SELECT COUNT(*) as total' + joins
     params = [user_id]
     
     if session_id:
-        query += ' AND session_id = ?'
-        count_query += ' AND session_id = ?'
+        query += ' AND w.session_id = ?'
+        count_query += ' AND w.session_id = ?'
         params.append(session_id)
     
     if search:
-        query += ' AND (word LIKE ? OR translation LIKE ?)'
-        count_query += ' AND (word LIKE ? OR translation LIKE ?)'
+        query += ' AND (l.word LIKE ? OR l.translation LIKE ?)'
+        count_query += ' AND (l.word LIKE ? OR l.translation LIKE ?)'
         search_param = f'%{search}%'
         params.append(search_param)
         params.append(search_param)
@@ -286,11 +379,12 @@ def get_words():
     total = cursor.fetchone()['total']
     
     # Get paginated results
-    query += ' ORDER BY timestamp DESC LIMIT ? OFFSET ?'
+    query += ' ORDER BY w.timestamp DESC LIMIT ? OFFSET ?'
     params.extend([limit, offset])
     
     cursor.execute(query, params)
     rows = cursor.fetchall()
+    conn.commit()
     conn.close()
     
     words = [dict(row) for row in rows]
@@ -299,10 +393,160 @@ def get_words():
         'words': words,
         'total': total,
         'page': (offset // limit) + 1,
-        'per_page': limit
+        'per_page': limit,
+        'version': version
     })
 
-@app.route('/api/stats', methods=['GET'])
+@bp.route('/api/words/changes', methods=['GET'])
+@requires_auth
+def get_word_changes():
+    """Get words inserted and deleted since a change version"""
+    since = request.args.get('since', type=int)
+    user_id = get_user_id()
+    
+    if since is None:
+        return jsonify({'error': 'No since version provided'}), 400
+    
+    conn = get_db()
+    cursor = conn.cursor()
+    
+    cursor.execute('SELECT version, pruned_version FROM data_versions WHERE scope = ?', (user_id,))
+    row = cursor.fetchone()
+    version = row['version'] if row else 0
+    pruned_version = row['pruned_version'] if row else 0
+    
+    # A version from the future (e.g. a reset database) can't be patched, and
+    # one older than the pruned tombstones could miss deletions
+    if since > version or since < pruned_version:
+        conn.close()
+        return jsonify({'success': True, 'reset': True, 'version': version})
+    
+    cursor.execute(f'''
+        SELECT {WORD_COLUMNS}
+        FROM arabic_words w JOIN lexicon l ON l.id = w.lexicon_id
+        WHERE w.user_id = ? AND w.change_version > ? AND w.change_version <= ?
+        ORDER BY w.change_version, w.id
+        LIMIT ?
+    ''', (user_id, since, version, MAX_SYNC_CHANGES + 1))
+    inserted = [dict(row) for row in cursor.fetchall()]
+    
+    # Rows both added and deleted since `since` were never seen by the client
+    cursor.execute('''
+        SELECT word_id FROM word_tombstones
+        WHERE user_id = ? AND change_version > ? AND change_version <= ? AND inserted_version <= ?
+        LIMIT ?
+    ''', (user_id, since, version, since, MAX_SYNC_CHANGES + 1))
+    deleted = [row['word_id'] for row in cursor.fetchall()]
+    conn.close()
+    
+    # Too far behind: reloading the page is cheaper than patching
+    if len(inserted) > MAX_SYNC_CHANGES or len(deleted) > MAX_SYNC_CHANGES:
+        return jsonify({'success': True, 'reset': True, 'version': version})
+    
+    return jsonify({
+        'success': True,
+        'reset': False,
+        'version': version,
+        'inserted': inserted,
+        'deleted': deleted
+    })
+
+@bp.route('/api/words/similar', methods=['GET'])
+@requires_auth
+def get_similar_words():
+    """Get saved words that sound like a query word
+
+    Not conditional: results also depend on the phoneme index, which the
+    backfill and init-db fill without bumping any data version.
+    """
+    word = request.args.get('word', '').strip()
+    limit = max(1, min(request.args.get('limit', 10, type=int), MAX_SIMILAR_WORDS))
+    max_distance = request.args.get('maxDistance', type=int)
+    user_id = get_user_id()
+
+    if not word:
+        return jsonify({'error': 'No word provided'}), 400
+
+    phonemes, token_ids = phonetics.phonetise(word)
+
+    conn = get_db()
+    cursor = conn.cursor()
+    matches = phonetic_search.find_similar(
+        cursor, user_id, phonetic_search.parse_token_ids(token_ids), limit, max_distance
+    )
+
+    words = []
+    if matches:
+        # Latest saved row of each matched lexicon entry
+        placeholders = ', '.join('?' * len(matches))
+        cursor.execute(f'''
+            SELECT {WORD_COLUMNS}, l.phonemes, w.lexicon_id
+            FROM arabic_words w JOIN lexicon l ON l.id = w.lexicon_id
+            WHERE w.id IN (
+                SELECT MAX(id) FROM arabic_words
+                WHERE user_id = ? AND lexicon_id IN ({placeholders})
+                GROUP BY lexicon_id
+            )
+        ''', (user_id, *[lexicon_id for lexicon_id, _ in matches]))
+        rows = {row['lexicon_id']: dict(row) for row in cursor.fetchall()}
+        for lexicon_id, distance in matches:
+            if lexicon_id in rows:
+                row = rows[lexicon_id]
+                del row['lexicon_id']
+                row['distance'] = distance
+                words.append(row)
+    conn.close()
+
+    return jsonify({
+        'success': True,
+        'word': word,
+        'phonemes': phonemes,
+        'words': words
+    })
+
+@bp.route('/api/audio', methods=['GET'])
+@requires_auth
+def get_audio():
+    """Look up the pronunciation clip for an Arabic text"""
+    arabic = request.args.get('text', '').strip()
+    if len(arabic) > audio.MAX_TEXT_LENGTH:
+        return jsonify({'error': f'Text is longer than {audio.MAX_TEXT_LENGTH} characters'}), 400
+    token_ids = phonetics.arabic_token_ids(arabic)
+    if not token_ids:
+        return jsonify({'error': 'No text provided'}), 400
+    
+    worker = audio.get_worker()
+    key = audio.clip_key(worker.synthesizer, token_ids)
+    if audio.clip_exists(key):
+        return jsonify({'ready': True, 'url': url_for('.get_audio_clip', key=key)})
+    
+    # Not rendered yet (e.g. saved before audio existed); never block on synthesis
+    try:
+        worker.submit(token_ids)
+    except audio.QueueFull:
+        response = jsonify({'error': 'Audio synthesis is busy, please retry shortly', 'retry_after': 5})
+        response.status_code = 503
+        response.headers['Retry-After'] = '5'
+        return response
+    response = jsonify({'ready': False, 'retry_after': 1})
+    response.status_code = 202
+    response.headers['Retry-After'] = '1'
+    return response
+
+@bp.route('/audio/<key>.wav', methods=['GET'])
+def get_audio_clip(key):
+    """Serve a content-addressed clip with range support"""
+    if len(key) != 64 or any(c not in '0123456789abcdef' for c in key):
+        abort(404)
+    
+    response = send_from_directory(os.path.abspath(audio.AUDIO_DIR), audio.clip_filename(key),
+                                   mimetype='audio/wav', max_age=audio.CLIP_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+@bp.route('/api/stats', methods=['GET'])
+@conditional(lambda: GLOBAL_SCOPE)
 def get_stats():
     """Get word statistics"""
     conn = get_db()
@@ -311,7 +555,7 @@ def get_stats():
     cursor.execute('''
         SELECT 
             COUNT(*) as total_words,
-            COUNT(DISTINCT word) as unique_words,
+            COUNT(DISTINCT lexicon_id) as unique_words,
             COUNT(DISTINCT session_id) as total_sessions
         FROM arabic_words
     ''')
@@ -321,7 +565,13 @@ def get_stats():
     
     return jsonify({'stats': stats})
 
-@app.route('/api/frequency', methods=['GET'])
+@bp.route('/api/stats/llm', methods=['GET'])
+def get_llm_stats():
+    """Get translation rate limits and current usage"""
+    return jsonify({'llm': llm_budget.stats()})
+
+@bp.route('/api/frequency', methods=['GET'])
+@conditional(lambda: GLOBAL_SCOPE)
 def get_frequency():
     """Get word frequency"""
     limit = request.args.get('limit', 20, type=int)
@@ -331,10 +581,11 @@ def get_frequency():
     
     cursor.execute('''
         SELECT 
-            word,
+            l.word,
             COUNT(*) as count
-        FROM arabic_words
-        GROUP BY word
+        FROM arabic_words w
+        JOIN lexicon l ON l.id = w.lexicon_id
+        GROUP BY w.lexicon_id
         ORDER BY count DESC
         LIMIT ?
     ''', (limit,))
@@ -345,7 +596,7 @@ def get_frequency():
     frequency = [dict(row) for row in rows]
     return jsonify({'frequency': frequency})
 
-@app.route('/api/words', methods=['DELETE'])
+@bp.route('/api/words', methods=['DELETE'])
 def delete_words():
     """Delete words from database"""
     session_id = request.args.get('sessionId')
@@ -354,16 +605,16 @@ def delete_words():
     cursor = conn.cursor()
     
     if session_id:
-        cursor.execute('DELETE FROM arabic_words WHERE session_id = ?', (session_id,))
+        remove_words(cursor, 'session_id = ?', (session_id,))
     else:
-        cursor.execute('DELETE FROM arabic_words')
+        remove_words(cursor, '1', ())
     
     conn.commit()
     conn.close()
     
     return jsonify({'success': True, 'message': 'Words deleted'})
 
-@app.route('/api/words/<int:word_id>', methods=['DELETE'])
+@bp.route('/api/words/<int:word_id>', methods=['DELETE'])
 @requires_auth
 def delete_word(word_id):
     """Delete a single word by ID"""
@@ -372,16 +623,16 @@ def delete_word(word_id):
     cursor = conn.cursor()
     
     # Only delete if word belongs to current user
-    cursor.execute('DELETE FROM arabic_words WHERE id = ? AND user_id = ?', (word_id, user_id))
-    conn.commit()
-    
-    if cursor.rowcount == 0:
+    if not remove_words(cursor, 'id = ? AND user_id = ?', (word_id, user_id)):
         conn.close()
         return jsonify({'success': False, 'error': 'Word not found'}), 404
     
+    conn.commit()
     conn.close()
     return jsonify({'success': True, 'message': 'Word deleted'})
 
 if __name__ == '__main__':
+    # Development server; see wsgi.py for running under a multi-worker server
+    db.init_db()
     print('Arabic Writer app running at http://localhost:5000')
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    create_app().run(debug=True, host='0.0.0.0', port=5000)
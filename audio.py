@@ -0,0 +1,170 @@
+import array
+import hashlib
+import importlib
+import io
+import math
+import os
+import queue
+import threading
+import time
+import wave
+
+import metrics
+
+AUDIO_DIR = os.getenv('AUDIO_DIR', 'audio_cache')
+
+# Clips are immutable once written, so they can be cached for a year
+CLIP_MAX_AGE = 31536000
+
+# Longest text rendered, in characters (about a sentence)
+MAX_TEXT_LENGTH = int(os.getenv('AUDIO_MAX_TEXT_LENGTH', 200))
+
+# Clips waiting for synthesis before new ones are refused
+MAX_QUEUE = int(os.getenv('AUDIO_MAX_QUEUE', 500))
+
+
+class QueueFull(Exception):
+    """Raised when the synthesis queue already holds MAX_QUEUE clips"""
+
+
+class PlaceholderSynthesizer:
+    """Offline stand-in for a speech model: one short tone per phoneme token
+
+    Deterministic and dependency-free, so tests and load tests exercise the
+    whole pipeline. Real synthesizers implement the same two members and
+    are selected with AUDIO_SYNTHESIZER=module:Class.
+    """
+
+    name = 'placeholder-v1'
+    sample_rate = 16000
+    tone_seconds = 0.08
+
+    def synthesize(self, token_ids):
+        """Render token ids to WAV bytes"""
+        samples = array.array('h')
+        tone_length = int(self.sample_rate * self.tone_seconds)
+        for token_id in token_ids:
+            frequency = 200 + 20 * token_id
+            for i in range(tone_length):
+                # Short fade in/out keeps tone boundaries from clicking
+                envelope = min(1.0, i / 200, (tone_length - i) / 200)
+                samples.append(int(8000 * envelope * math.sin(2 * math.pi * frequency * i / self.sample_rate)))
+
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(samples.tobytes())
+        return buffer.getvalue()
+
+
+def load_synthesizer():
+    """Instantiate the synthesizer named by AUDIO_SYNTHESIZER"""
+    spec = os.getenv('AUDIO_SYNTHESIZER')
+    if not spec:
+        return PlaceholderSynthesizer()
+    module_name, _, class_name = spec.partition(':')
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+def clip_key(synthesizer, token_ids):
+    """Content address of a clip: the synthesizer plus the token sequence"""
+    content = f"{synthesizer.name}:{' '.join(map(str, token_ids))}"
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def clip_filename(key):
+    """Path of a clip relative to AUDIO_DIR, sharded by key prefix"""
+    return f'{key[:2]}/{key}.wav'
+
+
+def clip_exists(key):
+    return os.path.isfile(os.path.join(AUDIO_DIR, clip_filename(key)))
+
+
+class AudioWorker:
+    """Background thread rendering queued token sequences into the clip store"""
+
+    def __init__(self, synthesizer, max_queue=MAX_QUEUE):
+        self.synthesizer = synthesizer
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.pending = set()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='audio-worker', daemon=True)
+        self._thread.start()
+
+    def submit(self, token_ids):
+        """Queue a clip for synthesis unless it exists or is already queued; return its key
+
+        Raises QueueFull instead of waiting when the queue is at capacity.
+        """
+        key = clip_key(self.synthesizer, token_ids)
+        with self._lock:
+            if key in self.pending or clip_exists(key):
+                return key
+            self.pending.add(key)
+        try:
+            self.queue.put_nowait((key, token_ids))
+        except queue.Full:
+            with self._lock:
+                self.pending.discard(key)
+            raise QueueFull()
+        metrics.AUDIO_QUEUE_DEPTH.inc()
+        return key
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            key, token_ids = item
+            metrics.AUDIO_QUEUE_DEPTH.dec()
+            try:
+                self._render(key, token_ids)
+            except Exception as e:
+                metrics.AUDIO_FAILURES.inc()
+                print(f"Audio synthesis error: {e}")
+            finally:
+                with self._lock:
+                    self.pending.discard(key)
+
+    def close(self):
+        """Render everything already queued, then stop the thread"""
+        if not self._thread.is_alive():
+            return
+        self.queue.put(None)
+        self._thread.join()
+
+    def _render(self, key, token_ids):
+        if clip_exists(key):
+            return
+        start = time.perf_counter()
+        data = self.synthesizer.synthesize(token_ids)
+        metrics.AUDIO_SYNTHESIS_LATENCY.observe(time.perf_counter() - start)
+        # Clips are immutable once stored, so never store a broken one
+        if not data:
+            raise ValueError(f'{self.synthesizer.name} returned no audio')
+
+        # Write then rename so readers never see a partial clip
+        path = os.path.join(AUDIO_DIR, clip_filename(key))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        metrics.AUDIO_CLIPS.inc()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_worker():
+    """Get the audio worker, starting it on first use (after any fork)"""
+    global _worker
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                _worker = AudioWorker(load_synthesizer())
+    return _worker
@@ -0,0 +1,127 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import click
+
+import db
+import phonetic_search
+import phonetics
+
+JOB_NAME = 'lexicon_phonemes'
+
+
+def get_checkpoint(cursor, job):
+    """Get (last_id, rows_done) of a job, (0, 0) if it never ran"""
+    cursor.execute('SELECT last_id, rows_done FROM backfill_checkpoints WHERE job = ?', (job,))
+    row = cursor.fetchone()
+    return (row['last_id'], row['rows_done']) if row else (0, 0)
+
+
+def save_checkpoint(cursor, job, last_id, rows_done):
+    cursor.execute('''
+        INSERT INTO backfill_checkpoints (job, last_id, rows_done, updated_at)
+        VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(job) DO UPDATE SET
+            last_id = excluded.last_id,
+            rows_done = excluded.rows_done,
+            updated_at = CURRENT_TIMESTAMP
+    ''', (job, last_id, rows_done))
+
+
+def read_chunk(cursor, after_id, chunk_size):
+    """Next rows missing phonemes, in primary-key order"""
+    cursor.execute('''
+        SELECT id, word FROM lexicon
+        WHERE id > ? AND phonemes IS NULL
+        ORDER BY id
+        LIMIT ?
+    ''', (after_id, chunk_size))
+    return [(row['id'], row['word']) for row in cursor.fetchall()]
+
+
+def run_backfill(chunk_size=500, workers=None, restart=False):
+    """Fill lexicon.phonemes/token_ids and the phoneme index across a process pool
+
+    Chunks are phonetised in parallel but written back in key order, one
+    transaction per chunk together with the checkpoint, so a crashed run
+    resumes after the last committed chunk.
+    """
+    workers = workers or os.cpu_count() or 1
+    conn = db.get_db()
+    cursor = conn.cursor()
+
+    if restart:
+        save_checkpoint(cursor, JOB_NAME, 0, 0)
+        conn.commit()
+    last_id, rows_done = get_checkpoint(cursor, JOB_NAME)
+
+    cursor.execute('SELECT COUNT(*) FROM lexicon WHERE id > ? AND phonemes IS NULL', (last_id,))
+    remaining = cursor.fetchone()[0]
+    print(f'Backfilling phonemes for {remaining} lexicon rows after id {last_id} '
+          f'({workers} workers, chunks of {chunk_size})')
+
+    start = time.perf_counter()
+    write_seconds = 0.0
+    rows_this_run = 0
+    read_id = last_id
+    in_flight = deque()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            # Keep every worker busy with a couple of chunks queued
+            while len(in_flight) < workers * 2:
+                chunk = read_chunk(cursor, read_id, chunk_size)
+                if not chunk:
+                    break
+                read_id = chunk[-1][0]
+                in_flight.append((read_id, pool.submit(phonetics.phonetise_rows, chunk)))
+            if not in_flight:
+                break
+
+            chunk_last_id, future = in_flight.popleft()
+            results = future.result()
+
+            write_start = time.perf_counter()
+            cursor.executemany(
+                'UPDATE lexicon SET phonemes = ?, token_ids = ? WHERE id = ? AND phonemes IS NULL',
+                results
+            )
+            phonetic_search.index_rows(cursor, [(row_id, token_ids) for _, token_ids, row_id in results])
+            rows_done += len(results)
+            save_checkpoint(cursor, JOB_NAME, chunk_last_id, rows_done)
+            conn.commit()
+            write_seconds += time.perf_counter() - write_start
+
+            rows_this_run += len(results)
+            elapsed = time.perf_counter() - start
+            rate = rows_this_run / elapsed if elapsed else 0
+            eta = (remaining - rows_this_run) / rate if rate else 0
+            print(f'  {rows_this_run}/{remaining} rows, up to id {chunk_last_id}, '
+                  f'{rate:.0f} rows/s, eta {eta:.0f}s')
+
+    conn.close()
+    elapsed = time.perf_counter() - start
+    stats = {
+        'rows': rows_this_run,
+        'seconds': round(elapsed, 2),
+        'rows_per_second': round(rows_this_run / elapsed, 1) if elapsed else 0,
+        'write_seconds': round(write_seconds, 2),
+        'total_rows_done': rows_done,
+    }
+    print(f"Backfilled {stats['rows']} rows in {stats['seconds']}s "
+          f"({stats['rows_per_second']} rows/s, {stats['write_seconds']}s writing)")
+    return stats
+
+
+def init_app(app):
+    """Register the backfill-phonemes command"""
+
+    @app.cli.command('backfill-phonemes')
+    @click.option('--chunk-size', default=500, show_default=True, help='Rows per chunk and transaction.')
+    @click.option('--workers', default=None, type=int, help='Worker processes (default: CPU count).')
+    @click.option('--restart', is_flag=True, help='Ignore the checkpoint and start from the first row.')
+    def backfill_phonemes_command(chunk_size, workers, restart):
+        """Compute phonemes and token ids for existing lexicon rows"""
+        run_backfill(chunk_size=chunk_size, workers=workers, restart=restart)
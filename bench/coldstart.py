@@ -0,0 +1,61 @@
+"""Measure cold-start time of the app in fresh interpreter processes
+
+    python bench/coldstart.py --runs 10
+    python bench/coldstart.py --target "app:app"    # older trees without create_app()
+
+Reports the time to import the module and build the WSGI app, which is
+the work every pre-forked worker repeats on boot.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SNIPPET = '''
+import sys, time
+start = time.perf_counter()
+module_name, _, attr = {target!r}.partition(':')
+module = __import__(module_name)
+if attr.endswith('()'):
+    getattr(module, attr[:-2])()
+else:
+    getattr(module, attr)
+print(time.perf_counter() - start)
+'''
+
+
+def measure(target, env):
+    """Time one cold start in a new process"""
+    output = subprocess.run(
+        [sys.executable, '-c', SNIPPET.format(target=target)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--target', default='app:create_app()',
+                        help='module:attribute to load, append () to call a factory')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault('SECRET_KEY', 'coldstart')
+    env.setdefault('OPENAI_API_KEY', 'coldstart')
+
+    # The first run warms the bytecode cache and is discarded
+    measure(args.target, env)
+    times = [measure(args.target, env) * 1000 for _ in range(args.runs)]
+
+    print(f'{args.target}: {args.runs} runs')
+    print(f'  median {statistics.median(times):.1f} ms')
+    print(f'  min    {min(times):.1f} ms')
+    print(f'  max    {max(times):.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+"""Replay a realistic traffic mix against a running app
+
+Start the stub and the app with the test login enabled, then drive it:
+
+    python bench/stub_openai.py --port 8081 &
+    OPENAI_BASE_URL=http://127.0.0.1:8081/v1 OPENAI_API_KEY=stub ENABLE_TEST_LOGIN=1 \\
+        gunicorn --workers 4 --threads 8 --bind 127.0.0.1:5000 wsgi:app &
+    python bench/loadtest.py --users 32 --duration 60
+
+Each virtual user signs in through /_test/login with its own session and
+loops over weighted operations. Results are printed per endpoint and can
+be saved with --output to compare runs before and after a change.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+DEFAULT_MIX = 'translate=5,save=10,list=45,search=20,stats=10,delete=10'
+
+WORDS = ['كتاب', 'قلم', 'بيت', 'ماء', 'شمس', 'قمر', 'مدرسة', 'سيارة', 'باب', 'طعام',
+         'مدينة', 'صديق', 'عمل', 'وقت', 'يوم', 'ليلة', 'بحر', 'جبل', 'شجرة', 'نهر']
+
+SEARCHES = ['ك', 'ب', 'book', 'water', 'ma', 'ق']
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def parse_mix(mix):
+    """Parse 'op=weight,...' into ([ops], [weights])"""
+    ops, weights = [], []
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in VirtualUser.OPERATIONS:
+            raise SystemExit(f'Unknown operation: {name}')
+        ops.append(name.strip())
+        weights.append(float(weight or 1))
+    return ops, weights
+
+
+class Results:
+    """Thread-safe latency and status collection per endpoint"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, seconds, status):
+        with self._lock:
+            self.latencies[endpoint].append(seconds)
+            self.statuses[endpoint][status] += 1
+
+    def summary(self, elapsed):
+        rows = {}
+        for endpoint, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            statuses = dict(self.statuses[endpoint])
+            errors = sum(count for status, count in statuses.items()
+                         if status == 'error' or int(status) >= 500)
+            rows[endpoint] = {
+                'requests': len(values),
+                'rps': len(values) / elapsed,
+                'errors': errors,
+                'statuses': statuses,
+                'p50_ms': percentile(values, 50) * 1000,
+                'p95_ms': percentile(values, 95) * 1000,
+                'p99_ms': percentile(values, 99) * 1000,
+                'max_ms': values[-1] * 1000,
+            }
+        return rows
+
+
+class VirtualUser:
+    """One signed-in user with its own cookie jar and (optional) ETag cache"""
+
+    OPERATIONS = ('translate', 'save', 'list', 'search', 'stats', 'delete')
+
+    def __init__(self, index, args, results):
+        self.base_url = args.base_url.rstrip('/')
+        self.args = args
+        self.results = results
+        self.session = requests.Session()
+        self.sub = f'loadtest|{args.run_id}-{index}'
+        self.saved_ids = []
+        self.etags = {}
+
+    def request(self, endpoint, method, path, **kwargs):
+        url = f'{self.base_url}{path}'
+        headers = kwargs.pop('headers', {})
+        if self.args.etags and method == 'GET' and url in self.etags:
+            headers['If-None-Match'] = self.etags[url]
+
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, headers=headers, timeout=self.args.timeout, **kwargs)
+        except requests.RequestException:
+            self.results.record(endpoint, time.perf_counter() - start, 'error')
+            return None
+        self.results.record(endpoint, time.perf_counter() - start, str(response.status_code))
+
+        if self.args.etags and method == 'GET' and response.headers.get('ETag'):
+            self.etags[url] = response.headers['ETag']
+        return response
+
+    def login(self):
+        response = self.session.post(f'{self.base_url}/_test/login', json={'sub': self.sub}, timeout=self.args.timeout)
+        if response.status_code != 200:
+            raise SystemExit(f'Test login failed ({response.status_code}); is ENABLE_TEST_LOGIN=1 set?')
+
+    def translate(self):
+        self.request('POST /api/translate', 'POST', '/api/translate', json={'word': random.choice(WORDS)})
+
+    def save(self):
+        word = random.choice(WORDS)
+        self.request('POST /api/words', 'POST', '/api/words', json={
+            'words': [{
+                'word': word,
+                'translation': 'stub',
+                'phonetic': 'stub',
+                'sentence': 'Stub sentence.',
+                'arabic_sentence': word,
+            }],
+            'sessionId': f'session_{self.sub}',
+        })
+
+    def list(self):
+        page_size = random.choice([10, 10, 10, 20, 50])
+        page = random.choices([1, 2, 3], weights=[70, 20, 10])[0]
+        response = self.request('GET /api/words', 'GET', '/api/words',
+                                params={'limit': page_size, 'offset': (page - 1) * page_size})
+        # Remember ids so deletes hit real rows
+        if response is not None and response.status_code == 200:
+            self.saved_ids = [word['id'] for word in response.json().get('words', [])]
+
+    def search(self):
+        self.request('GET /api/words?search', 'GET', '/api/words',
+                     params={'limit': 10, 'offset': 0, 'search': random.choice(SEARCHES)})
+
+    def stats(self):
+        self.request('GET /api/stats', 'GET', '/api/stats')
+
+    def delete(self):
+        if not self.saved_ids:
+            self.list()
+            return
+        word_id = self.saved_ids.pop(random.randrange(len(self.saved_ids)))
+        self.request('DELETE /api/words/<id>', 'DELETE', f'/api/words/{word_id}')
+
+    def run(self, ops, weights, deadline, stop):
+        self.login()
+        while not stop.is_set() and time.monotonic() < deadline:
+            getattr(self, random.choices(ops, weights=weights)[0])()
+            if self.args.think_ms:
+                time.sleep(random.expovariate(1000 / self.args.think_ms))
+
+
+def print_summary(rows, elapsed):
+    total = sum(row['requests'] for row in rows.values())
+    print(f'\n{total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s)\n')
+    print(f"{'endpoint':<26}{'count':>8}{'req/s':>9}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for endpoint, row in rows.items():
+        print(f"{endpoint:<26}{row['requests']:>8}{row['rps']:>9.1f}{row['errors']:>8}"
+              f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['max_ms']:>9.1f}")
+    for endpoint, row in rows.items():
+        print(f'  {endpoint}: statuses {row["statuses"]}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--users', type=int, default=16, help='concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=30, help='seconds to run')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'weighted operations (default: {DEFAULT_MIX})')
+    parser.add_argument('--think-ms', type=float, default=0, help='mean pause between operations')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--etags', action='store_true', help='send If-None-Match like a browser cache would')
+    parser.add_argument('--run-id', default=str(int(time.time())), help='prefix for virtual user ids')
+    parser.add_argument('--output', help='write the summary as JSON to this file')
+    args = parser.parse_args()
+
+    ops, weights = parse_mix(args.mix)
+    results = Results()
+    stop = threading.Event()
+    users = [VirtualUser(i, args, results) for i in range(args.users)]
+
+    start = time.monotonic()
+    deadline = start + args.duration
+    threads = [threading.Thread(target=user.run, args=(ops, weights, deadline, stop), daemon=True)
+               for user in users]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            thread.join()
+    except KeyboardInterrupt:
+        stop.set()
+    elapsed = time.monotonic() - start
+
+    rows = results.summary(elapsed)
+    print_summary(rows, elapsed)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'args': vars(args), 'elapsed': elapsed, 'endpoints': rows}, f, indent=2)
+        print(f'\nSaved summary to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Local stand-in for the OpenAI chat-completions API
+
+    python bench/stub_openai.py --port 8081 --latency-ms 800 --jitter-ms 300 --error-rate 0.02
+
+Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:8081/v1 (any
+OPENAI_API_KEY works). Replies are canned translations in the JSON
+format /api/translate expects, with a usage block so token metrics move.
+"""
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TRANSLATIONS = [
+    {"english": "book", "phonetic": "kitaab", "sentence": "I read a book.", "arabic_sentence": "قرأت كتابا."},
+    {"english": "pen", "phonetic": "qalam", "sentence": "This is my pen.", "arabic_sentence": "هذا قلمي."},
+    {"english": "house", "phonetic": "bayt", "sentence": "The house is big.", "arabic_sentence": "البيت كبير."},
+    {"english": "water", "phonetic": "maa'", "sentence": "I drink water.", "arabic_sentence": "أشرب الماء."},
+]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves POST .../chat/completions"""
+
+    config = None
+
+    def log_message(self, format, *args):
+        if self.config.verbose:
+            super().log_message(format, *args)
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self.send_json(404, {'error': {'message': 'Not found', 'type': 'invalid_request_error'}})
+            return
+
+        config = self.config
+        delay = max(0.0, random.gauss(config.latency_ms, config.jitter_ms)) / 1000
+        time.sleep(delay)
+
+        roll = random.random()
+        if roll < config.rate_limit_rate:
+            self.send_json(429, {'error': {'message': 'Rate limit reached (stub)', 'type': 'rate_limit_error'}})
+            return
+        if roll < config.rate_limit_rate + config.error_rate:
+            self.send_json(500, {'error': {'message': 'Internal error (stub)', 'type': 'server_error'}})
+            return
+
+        content = json.dumps(random.choice(TRANSLATIONS), ensure_ascii=False)
+        prompt_tokens = sum(len(m.get('content', '')) for m in request.get('messages', [])) // 4
+        completion_tokens = len(content) // 4
+        self.send_json(200, {
+            'id': f'chatcmpl-stub-{random.getrandbits(48):x}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'stub'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop',
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens,
+            },
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency-ms', type=float, default=800, help='mean response latency')
+    parser.add_argument('--jitter-ms', type=float, default=250, help='standard deviation of latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of 500 responses')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='fraction of 429 responses')
+    parser.add_argument('--verbose', action='store_true', help='log every request')
+    args = parser.parse_args()
+
+    StubHandler.config = args
+    server = ThreadingHTTPServer((args.host, args.port), StubHandler)
+    print(f'Stub OpenAI listening on http://{args.host}:{args.port}/v1')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+# Responses of these types are compressed on the fly
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'text/javascript',
+    'text/css',
+    'text/html',
+    'text/plain',
+}
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 500
+
+# Static files that get precompressed .br/.gz siblings
+PRECOMPRESSED_ASSETS = ['script.js', 'styles.css', 'index.html']
+
+# Suffix of each precompressed variant, in order of preference
+PRECOMPRESSED_SUFFIXES = [('br', '.br'), ('gzip', '.gz')]
+
+# One year; only used for URLs carrying a content version (?v=...)
+STATIC_MAX_AGE = 31536000
+
+_asset_versions = {}
+
+
+def accepts_encoding(encoding):
+    """Check whether the client accepts a content encoding"""
+    return request.accept_encodings[encoding] > 0
+
+
+def compress(data, encoding):
+    """Compress bytes with the given content encoding"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=5)
+    return gzip.compress(data, compresslevel=6)
+
+
+def choose_encoding():
+    """Pick the best encoding this server and the client both support"""
+    if brotli is not None and accepts_encoding('br'):
+        return 'br'
+    if accepts_encoding('gzip'):
+        return 'gzip'
+    return None
+
+
+def compress_response(response):
+    """Compress JSON/text responses when the client supports it"""
+    response.vary.add('Accept-Encoding')
+
+    if (response.direct_passthrough
+            or response.status_code != 200
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    data = response.get_data()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return response
+
+    encoding = choose_encoding()
+    if encoding is None:
+        return response
+
+    response.set_data(compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def asset_version(static_folder, filename):
+    """Short content hash of a static file, cached until its mtime changes"""
+    path = os.path.join(static_folder, filename)
+    mtime = os.path.getmtime(path)
+    cached = _asset_versions.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with open(path, 'rb') as f:
+        version = hashlib.sha256(f.read()).hexdigest()[:12]
+    _asset_versions[path] = (mtime, version)
+    return version
+
+
+def find_precompressed(static_folder, filename):
+    """Return (encoding, filename) of a fresh precompressed variant, if any"""
+    source = os.path.join(static_folder, filename)
+    if not os.path.isfile(source):
+        return None
+
+    for encoding, suffix in PRECOMPRESSED_SUFFIXES:
+        variant = source + suffix
+        if (accepts_encoding(encoding)
+                and os.path.isfile(variant)
+                and os.path.getmtime(variant) >= os.path.getmtime(source)):
+            return encoding, filename + suffix
+    return None
+
+
+def init_app(app):
+    """Register compression, precompressed static serving and the CLI command"""
+
+    def serve_static(filename):
+        """Serve static files, preferring precompressed variants"""
+        versioned = bool(request.args.get('v'))
+        max_age = STATIC_MAX_AGE if versioned else None
+
+        variant = find_precompressed(app.static_folder, filename)
+        if variant:
+            encoding, variant_filename = variant
+            mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            response = send_from_directory(app.static_folder, variant_filename,
+                                           mimetype=mimetype, max_age=max_age)
+            response.headers['Content-Encoding'] = encoding
+        else:
+            response = send_from_directory(app.static_folder, filename, max_age=max_age)
+
+        response.vary.add('Accept-Encoding')
+        if versioned:
+            response.cache_control.immutable = True
+        return response
+
+    app.view_functions['static'] = serve_static
+    app.after_request(compress_response)
+
+    @app.cli.command('precompress')
+    def precompress():
+        """Write .gz (and .br, if brotli is installed) variants of static assets"""
+        for filename in PRECOMPRESSED_ASSETS:
+            path = os.path.join(app.static_folder, filename)
+            with open(path, 'rb') as f:
+                data = f.read()
+            for encoding, suffix in PRECOMPRESSED_SUFFIXES:
+                if encoding == 'br' and brotli is None:
+                    continue
+                if encoding == 'br':
+                    compressed = brotli.compress(data, quality=11)
+                else:
+                    compressed = gzip.compress(data, compresslevel=9)
+                with open(path + suffix, 'wb') as f:
+                    f.write(compressed)
+                print(f'{filename}{suffix}: {len(data)} -> {len(compressed)} bytes')
@@ -0,0 +1,382 @@
+import os
+import sqlite3
+import unicodedata
+from datetime import datetime, timezone
+
+import metrics
+import phonetic_search
+import phonetics
+
+DATABASE = os.getenv('DATABASE', 'arabicwriter.db')
+
+# Data version scope shared by the global (non per-user) endpoints
+GLOBAL_SCOPE = '*'
+
+# Tombstones older than this are pruned; clients further behind reload instead
+TOMBSTONE_RETENTION_DAYS = int(os.getenv('TOMBSTONE_RETENTION_DAYS', 30))
+
+
+def get_db():
+    """Get database connection"""
+    conn = sqlite3.connect(DATABASE, factory=metrics.TimedConnection)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def get_data_version(scope):
+    """Get (version, updated_at) of a data scope"""
+    conn = get_db()
+    cursor = conn.cursor()
+    cursor.execute('SELECT version, updated_at FROM data_versions WHERE scope = ?', (scope,))
+    row = cursor.fetchone()
+    conn.close()
+
+    if not row:
+        return 0, None
+    updated_at = datetime.strptime(row['updated_at'], '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+    return row['version'], updated_at
+
+
+def bump_data_version(cursor, user_ids):
+    """Advance the data version of the given users and of the global scope
+
+    Returns the new version of each user, used as the change version of
+    the rows and tombstones written in the same transaction. Rows saved
+    before user_id existed have NULL there and no scope of their own.
+    """
+    versions = {}
+    for scope in {user_id for user_id in user_ids if user_id is not None} | {GLOBAL_SCOPE}:
+        cursor.execute('''
+            INSERT INTO data_versions (scope, version, updated_at) VALUES (?, 1, CURRENT_TIMESTAMP)
+            ON CONFLICT(scope) DO UPDATE SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+        ''', (scope,))
+        cursor.execute('SELECT version FROM data_versions WHERE scope = ?', (scope,))
+        versions[scope] = cursor.fetchone()[0]
+    return versions
+
+
+# Columns of a user's word as returned by GET /api/words
+WORD_COLUMNS = '''
+    w.id, l.word, l.translation, l.phonetic, l.sentence, l.arabic_sentence,
+    w.timestamp, w.session_id, w.user_id
+'''
+
+
+def normalize_word(word):
+    """Lexicon key of a word: NFC with collapsed whitespace"""
+    return ' '.join(unicodedata.normalize('NFC', word or '').split())
+
+
+# Shared lexicon fields that a later save may fill in when blank
+LEXICON_FIELDS = ('translation', 'phonetic', 'sentence', 'arabic_sentence')
+
+
+def get_lexicon_id(cursor, item):
+    """Find or create the shared lexicon entry for a word, filling any blank fields
+
+    Returns (lexicon_id, filled) where `filled` tells whether an existing
+    entry changed, i.e. other users' word lists now read differently.
+    """
+    word = normalize_word(item.get('word', ''))
+    cursor.execute(f'SELECT {", ".join(LEXICON_FIELDS)} FROM lexicon WHERE word = ?', (word,))
+    before = cursor.fetchone()
+
+    phonemes, token_ids = phonetics.phonetise(word)
+    cursor.execute('''
+        INSERT INTO lexicon (word, translation, phonetic, sentence, arabic_sentence, phonemes, token_ids)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(word) DO UPDATE SET
+            translation = COALESCE(NULLIF(lexicon.translation, ''), excluded.translation),
+            phonetic = COALESCE(NULLIF(lexicon.phonetic, ''), excluded.phonetic),
+            sentence = COALESCE(NULLIF(lexicon.sentence, ''), excluded.sentence),
+            arabic_sentence = COALESCE(NULLIF(lexicon.arabic_sentence, ''), excluded.arabic_sentence),
+            phonemes = COALESCE(lexicon.phonemes, excluded.phonemes),
+            token_ids = COALESCE(lexicon.token_ids, excluded.token_ids)
+    ''', (word, item.get('translation', ''), item.get('phonetic', ''),
+          item.get('sentence', ''), item.get('arabic_sentence', ''), phonemes, token_ids))
+    cursor.execute(f'SELECT id, token_ids, {", ".join(LEXICON_FIELDS)} FROM lexicon WHERE word = ?', (word,))
+    row = cursor.fetchone()
+    phonetic_search.index_rows(cursor, [(row['id'], row['token_ids'])])
+
+    filled = before is not None and tuple(before) != tuple(row[field] for field in LEXICON_FIELDS)
+    return row['id'], filled
+
+
+def insert_words(cursor, user_id, session_id, words_data, change_version):
+    """Insert a user's words as sent to POST /api/words (no commit)"""
+    filled_ids = set()
+    for item in words_data:
+        if normalize_word(item.get('word', '')):
+            lexicon_id, filled = get_lexicon_id(cursor, item)
+            if filled:
+                filled_ids.add(lexicon_id)
+            cursor.execute(
+                'INSERT INTO arabic_words (lexicon_id, session_id, user_id, change_version) VALUES (?, ?, ?, ?)',
+                (lexicon_id, session_id, user_id, change_version)
+            )
+
+    # Other users who saved a filled-in word now read new data: void their ETags
+    if filled_ids:
+        placeholders = ', '.join('?' * len(filled_ids))
+        cursor.execute(f'''
+            SELECT DISTINCT user_id FROM arabic_words
+            WHERE lexicon_id IN ({placeholders}) AND user_id != ?
+        ''', (*filled_ids, user_id))
+        other_users = [row[0] for row in cursor.fetchall()]
+        if other_users:
+            bump_data_version(cursor, other_users)
+
+
+def remove_words(cursor, where, params):
+    """Delete arabic_words rows matching `where`, leaving tombstones for delta sync
+
+    Returns the ids of the users whose words were deleted. Rows without a
+    user_id belong to no one's list, so they get no tombstone.
+    """
+    cursor.execute(f'SELECT DISTINCT user_id FROM arabic_words WHERE {where}', params)
+    user_ids = [row[0] for row in cursor.fetchall()]
+    if not user_ids:
+        return []
+
+    bump_data_version(cursor, user_ids)
+    cursor.execute(f'''
+        INSERT INTO word_tombstones (word_id, user_id, change_version, inserted_version)
+        SELECT id, user_id, version, change_version FROM arabic_words
+        JOIN data_versions ON scope = user_id
+        WHERE {where}
+    ''', params)
+    cursor.execute(f'DELETE FROM arabic_words WHERE {where}', params)
+    prune_tombstones(cursor)
+    return user_ids
+
+
+def prune_tombstones(cursor, retention_days=None):
+    """Drop tombstones past the retention period (no commit)
+
+    Each user's pruned_version records the newest change version dropped,
+    so /api/words/changes can tell a client it is too far behind.
+    """
+    if retention_days is None:
+        retention_days = TOMBSTONE_RETENTION_DAYS
+    cutoff = f'-{retention_days} days'
+    cursor.execute('''
+        INSERT INTO data_versions (scope, version, pruned_version)
+        SELECT user_id, MAX(change_version), MAX(change_version) FROM word_tombstones
+        WHERE deleted_at < datetime('now', ?) AND user_id IS NOT NULL
+        GROUP BY user_id
+        ON CONFLICT(scope) DO UPDATE SET pruned_version = MAX(pruned_version, excluded.pruned_version)
+    ''', (cutoff,))
+    cursor.execute("DELETE FROM word_tombstones WHERE deleted_at < datetime('now', ?)", (cutoff,))
+
+
+def create_word_tables(cursor):
+    """Create the shared lexicon and the per-user word table"""
+    cursor.execute('''
+        CREATE TABLE lexicon (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            word TEXT NOT NULL UNIQUE,
+            translation TEXT,
+            phonetic TEXT,
+            sentence TEXT,
+            arabic_sentence TEXT,
+            phonemes TEXT,
+            token_ids TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE arabic_words (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            lexicon_id INTEGER NOT NULL REFERENCES lexicon(id),
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            session_id TEXT,
+            user_id TEXT,
+            change_version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute('CREATE INDEX idx_arabic_words_user ON arabic_words (user_id, timestamp)')
+
+
+def migrate_to_lexicon(conn):
+    """Move per-row translation data into the shared lexicon, keeping word ids"""
+    print('Migrating words to shared lexicon...')
+    conn.create_function('normalize_word', 1, normalize_word, deterministic=True)
+    cursor = conn.cursor()
+    cursor.execute('BEGIN')
+
+    cursor.execute('ALTER TABLE arabic_words RENAME TO arabic_words_old')
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'arabic_words_old'")
+    row = cursor.fetchone()
+    last_id = row[0] if row else 0
+    create_word_tables(cursor)
+
+    # The first saved copy of each word becomes the shared entry
+    cursor.execute('''
+        INSERT OR IGNORE INTO lexicon (word, translation, phonetic, sentence, arabic_sentence)
+        SELECT normalize_word(word), translation, phonetic, sentence, arabic_sentence
+        FROM arabic_words_old
+        WHERE normalize_word(word) != ''
+        ORDER BY id
+    ''')
+    cursor.execute('''
+        INSERT INTO arabic_words (id, lexicon_id, timestamp, session_id, user_id)
+        SELECT o.id, l.id, o.timestamp, o.session_id, o.user_id
+        FROM arabic_words_old o
+        JOIN lexicon l ON l.word = normalize_word(o.word)
+        ORDER BY o.id
+    ''')
+    cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'arabic_words'", (last_id,))
+
+    cursor.execute('SELECT COUNT(*) FROM arabic_words_old')
+    rows = cursor.fetchone()[0]
+    cursor.execute('SELECT COUNT(*) FROM lexicon')
+    entries = cursor.fetchone()[0]
+    cursor.execute('DROP TABLE arabic_words_old')
+    conn.commit()
+    print(f'Migrated {rows} words into {entries} lexicon entries')
+
+
+def init_db():
+    """Initialize the database"""
+    conn = get_db()
+    cursor = conn.cursor()
+
+    # Check if table exists
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='arabic_words'")
+    table_exists = cursor.fetchone()
+
+    if table_exists:
+        cursor.execute("PRAGMA table_info(arabic_words)")
+        columns = [col[1] for col in cursor.fetchall()]
+
+        # Rows that still carry their own copy of the word data
+        if 'lexicon_id' not in columns:
+            # Check and add missing columns
+            if 'translation' not in columns:
+                print('Adding translation column...')
+                cursor.execute('ALTER TABLE arabic_words ADD COLUMN translation TEXT')
+            if 'phonetic' not in columns:
+                print('Adding phonetic column...')
+                cursor.execute('ALTER TABLE arabic_words ADD COLUMN phonetic TEXT')
+            if 'sentence' not in columns:
+                print('Adding sentence column...')
+                cursor.execute('ALTER TABLE arabic_words ADD COLUMN sentence TEXT')
+            if 'arabic_sentence' not in columns:
+                print('Adding arabic_sentence column...')
+                cursor.execute('ALTER TABLE arabic_words ADD COLUMN arabic_sentence TEXT')
+            if 'user_id' not in columns:
+                print('Adding user_id column...')
+                cursor.execute('ALTER TABLE arabic_words ADD COLUMN user_id TEXT')
+            conn.commit()
+
+            migrate_to_lexicon(conn)
+
+        # Per-user change version of each row, for /api/words/changes
+        cursor.execute("PRAGMA table_info(arabic_words)")
+        if 'change_version' not in [col[1] for col in cursor.fetchall()]:
+            print('Adding change_version column...')
+            cursor.execute('ALTER TABLE arabic_words ADD COLUMN change_version INTEGER NOT NULL DEFAULT 0')
+
+        # Phonemes/token ids computed with the text package (see backfill.py)
+        cursor.execute("PRAGMA table_info(lexicon)")
+        lexicon_columns = [col[1] for col in cursor.fetchall()]
+        if 'phonemes' not in lexicon_columns:
+            print('Adding phonemes column...')
+            cursor.execute('ALTER TABLE lexicon ADD COLUMN phonemes TEXT')
+        if 'token_ids' not in lexicon_columns:
+            print('Adding token_ids column...')
+            cursor.execute('ALTER TABLE lexicon ADD COLUMN token_ids TEXT')
+        conn.commit()
+    else:
+        # Create tables with all columns
+        create_word_tables(cursor)
+        conn.commit()
+
+    # Deleted word ids, so clients can drop them from a synced list
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS word_tombstones (
+            word_id INTEGER NOT NULL,
+            user_id TEXT,
+            change_version INTEGER NOT NULL,
+            inserted_version INTEGER NOT NULL DEFAULT 0,
+            deleted_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_word_tombstones_user ON word_tombstones (user_id, change_version)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_word_tombstones_deleted ON word_tombstones (deleted_at)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_arabic_words_changes ON arabic_words (user_id, change_version)')
+
+    # Resume points of batch jobs such as backfill.py
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS backfill_checkpoints (
+            job TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL DEFAULT 0,
+            rows_done INTEGER NOT NULL DEFAULT 0,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Phoneme n-gram -> lexicon entry, for /api/words/similar
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS phoneme_ngrams (
+            gram INTEGER NOT NULL,
+            lexicon_id INTEGER NOT NULL,
+            PRIMARY KEY (gram, lexicon_id)
+        ) WITHOUT ROWID
+    ''')
+    # (Re)index everything when the table is new or predates bigrams
+    cursor.execute('SELECT 1 FROM phoneme_ngrams WHERE gram >= ? LIMIT 1',
+                   (phonetic_search.NGRAM_OFFSETS[phonetic_search.SHORT_NGRAM_SIZE],))
+    if not cursor.fetchone():
+        cursor.execute("SELECT id, token_ids FROM lexicon WHERE token_ids IS NOT NULL AND token_ids != ''")
+        rows = [(row['id'], row['token_ids']) for row in cursor.fetchall()]
+        if rows:
+            print(f'Indexing phonemes of {len(rows)} lexicon entries...')
+            phonetic_search.index_rows(cursor, rows)
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_arabic_words_lexicon_user ON arabic_words (lexicon_id, user_id)')
+    # Covered by the (lexicon_id, user_id) index above
+    cursor.execute('DROP INDEX IF EXISTS idx_arabic_words_lexicon')
+
+    # Translation rate limits shared by all workers (see ratelimit.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS llm_buckets (
+            name TEXT PRIMARY KEY,
+            tokens REAL NOT NULL,
+            updated REAL NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_llm_buckets_updated ON llm_buckets (updated)')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS llm_inflight (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pid INTEGER,
+            started REAL NOT NULL
+        )
+    ''')
+
+    # Per-user (and global) data versions used for conditional GETs
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS data_versions (
+            scope TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            pruned_version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute("PRAGMA table_info(data_versions)")
+    if 'pruned_version' not in [col[1] for col in cursor.fetchall()]:
+        print('Adding pruned_version column...')
+        cursor.execute('ALTER TABLE data_versions ADD COLUMN pruned_version INTEGER NOT NULL DEFAULT 0')
+    conn.commit()
+
+    conn.close()
+    print('Database initialized')
+
+
+def init_app(app):
+    """Register the init-db command"""
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create or migrate the database schema"""
+        init_db()
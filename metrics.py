@@ -0,0 +1,218 @@
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from flask import Response, abort, g, has_request_context, request
+from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge,
+                               Histogram, REGISTRY, generate_latest)
+from prometheus_client import multiprocess
+
+# HTTP
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'HTTP request latency by route',
+    ['method', 'endpoint'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+REQUEST_COUNT = Counter(
+    'http_requests_total', 'HTTP responses by route and status',
+    ['method', 'endpoint', 'status'],
+)
+
+# OpenAI
+OPENAI_LATENCY = Histogram(
+    'openai_request_duration_seconds', 'Chat completion latency',
+    ['model'],
+    buckets=(0.25, 0.5, 1, 1.5, 2, 3, 5, 8, 13, 20, 30, 60),
+)
+OPENAI_FAILURES = Counter(
+    'openai_request_failures_total', 'Failed chat completion calls',
+    ['model', 'error'],
+)
+OPENAI_TOKENS = Counter(
+    'openai_tokens_total', 'Tokens reported in chat completion usage',
+    ['model', 'kind'],
+)
+
+# LLM budget (ratelimit.LLMBudget)
+LLM_INFLIGHT = Gauge(
+    'llm_inflight_requests', 'Chat completions currently in flight',
+    multiprocess_mode='livesum',
+)
+LLM_QUEUE_DEPTH = Gauge(
+    'llm_queued_requests', 'Requests waiting for an in-flight slot',
+    multiprocess_mode='livesum',
+)
+LLM_REJECTIONS = Counter(
+    'llm_rejected_requests_total', 'Requests answered with 429 by the LLM budget',
+    ['reason'],
+)
+
+# Pronunciation audio (audio.AudioWorker)
+AUDIO_QUEUE_DEPTH = Gauge(
+    'audio_synthesis_queue_depth', 'Clips waiting to be synthesized',
+    multiprocess_mode='livesum',
+)
+AUDIO_SYNTHESIS_LATENCY = Histogram(
+    'audio_synthesis_duration_seconds', 'Time to synthesize one clip',
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+AUDIO_CLIPS = Counter(
+    'audio_clips_synthesized_total', 'Clips written to the audio store',
+)
+AUDIO_FAILURES = Counter(
+    'audio_synthesis_failures_total', 'Clips that failed to synthesize',
+)
+
+# Write-behind saves (writebehind.WriteBehindQueue)
+WRITE_QUEUE_DEPTH = Gauge(
+    'write_behind_queue_rows', 'Rows waiting for a group commit',
+    multiprocess_mode='livesum',
+)
+WRITE_BATCH_ROWS = Histogram(
+    'write_behind_batch_rows', 'Rows per group commit',
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+WRITE_COMMIT_LATENCY = Histogram(
+    'write_behind_commit_duration_seconds', 'Time to write and commit one batch',
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+
+# SQLite
+DB_QUERY_LATENCY = Histogram(
+    'db_query_duration_seconds', 'SQLite statement latency by handler',
+    ['handler'],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+DB_CONNECTIONS = Counter(
+    'db_connections_opened_total', 'SQLite connections opened by handler',
+    ['handler'],
+)
+DB_CONNECTIONS_OPEN = Gauge(
+    'db_connections_open', 'SQLite connections currently open',
+    multiprocess_mode='livesum',
+)
+
+# Phonetiser (text package)
+PHONETISER_WORDS = Counter(
+    'phonetiser_words_total', 'Words converted to phonemes/tokens in-process',
+)
+PHONETISER_LATENCY = Histogram(
+    'phonetiser_duration_seconds', 'Time spent in the text phonetiser per call',
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05),
+)
+
+
+def current_handler():
+    """Label for the code path issuing a query"""
+    if has_request_context():
+        return request.endpoint or 'unmatched'
+    return 'background'
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that records statement latency per handler"""
+
+    def execute(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().execute(*args, **kwargs)
+        finally:
+            DB_QUERY_LATENCY.labels(current_handler()).observe(time.perf_counter() - start)
+
+    def executemany(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().executemany(*args, **kwargs)
+        finally:
+            DB_QUERY_LATENCY.labels(current_handler()).observe(time.perf_counter() - start)
+
+
+class TimedConnection(sqlite3.Connection):
+    """Connection that hands out TimedCursors and tracks open connections"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._open = True
+        DB_CONNECTIONS.labels(current_handler()).inc()
+        DB_CONNECTIONS_OPEN.inc()
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, *args, **kwargs):
+        return self.cursor().execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        return self.cursor().executemany(*args, **kwargs)
+
+    def close(self):
+        if self._open:
+            self._open = False
+            DB_CONNECTIONS_OPEN.dec()
+        super().close()
+
+
+@contextmanager
+def openai_call(model):
+    """Time a chat completion call and count it as failed if it raises"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        OPENAI_FAILURES.labels(model, type(e).__name__).inc()
+        raise
+    finally:
+        OPENAI_LATENCY.labels(model).observe(time.perf_counter() - start)
+
+
+def record_openai_usage(model, response):
+    """Count prompt/completion tokens from a chat completion response"""
+    usage = getattr(response, 'usage', None)
+    if usage is None:
+        return
+    OPENAI_TOKENS.labels(model, 'prompt').inc(usage.prompt_tokens or 0)
+    OPENAI_TOKENS.labels(model, 'completion').inc(usage.completion_tokens or 0)
+
+
+@contextmanager
+def phonetiser_timer(words=1):
+    """Time a call into the text package and count the words it handled"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        PHONETISER_LATENCY.observe(time.perf_counter() - start)
+        PHONETISER_WORDS.inc(words)
+
+
+def init_app(app):
+    """Register request timing hooks and the /metrics endpoint"""
+
+    @app.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop('request_start', None)
+        if start is not None:
+            endpoint = request.endpoint or 'unmatched'
+            REQUEST_LATENCY.labels(request.method, endpoint).observe(time.perf_counter() - start)
+            REQUEST_COUNT.labels(request.method, endpoint, str(response.status_code)).inc()
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        """Expose metrics in the Prometheus text format"""
+        token = os.getenv('METRICS_TOKEN')
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            abort(401)
+
+        # Under a multi-worker server every process writes to this directory
+        if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,160 @@
+import bisect
+
+import text
+
+# Token ids that carry no sound of their own
+IGNORED_IDS = frozenset(text.tokens_to_ids(['_pad_', text.EOS_TOKEN, '_sil_', text.SEPARATOR_TOKEN]))
+
+# Marks word start/end inside n-grams (the padding token never occurs in words)
+BOUNDARY_ID = 0
+
+SYMBOL_COUNT = len(text.symbols)
+
+# Trigrams are the selective default; bigrams keep short queries recallable.
+# Each size gets its own range of packed values in phoneme_ngrams.gram.
+NGRAM_SIZE = 3
+SHORT_NGRAM_SIZE = 2
+NGRAM_OFFSETS = {NGRAM_SIZE: 0, SHORT_NGRAM_SIZE: SYMBOL_COUNT ** NGRAM_SIZE}
+
+# How many n-gram candidates are re-ranked by edit distance
+MAX_CANDIDATES = 200
+
+
+def parse_token_ids(token_ids):
+    """Sound-bearing token ids from a lexicon.token_ids string"""
+    return [int(i) for i in (token_ids or '').split() if int(i) not in IGNORED_IDS]
+
+
+def ngrams(ids, size=NGRAM_SIZE):
+    """Distinct phoneme n-grams of a token id sequence, each packed into one integer"""
+    padded = [BOUNDARY_ID] + list(ids) + [BOUNDARY_ID]
+    grams = set()
+    for i in range(len(padded) - size + 1):
+        gram = 0
+        for token_id in padded[i:i + size]:
+            gram = gram * SYMBOL_COUNT + token_id
+        grams.add(NGRAM_OFFSETS[size] + gram)
+    return grams
+
+
+def index_rows(cursor, rows):
+    """Add (lexicon_id, token_ids string) rows to the n-gram index (no commit)"""
+    cursor.executemany(
+        'INSERT OR IGNORE INTO phoneme_ngrams (gram, lexicon_id) VALUES (?, ?)',
+        [(gram, lexicon_id) for lexicon_id, token_ids in rows
+         for size in NGRAM_OFFSETS
+         for gram in ngrams(parse_token_ids(token_ids), size)]
+    )
+
+
+def bounded_edit_distance(a, b, max_distance):
+    """Levenshtein distance of two sequences, or None if it exceeds max_distance
+
+    Only the diagonal band of width 2 * max_distance + 1 is computed, and the
+    scan stops as soon as a whole row is over the bound.
+    """
+    if a == b:
+        return 0
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+
+    over = max_distance + 1
+    previous = [j if j <= max_distance else over for j in range(len(b) + 1)]
+    for i, token in enumerate(a, 1):
+        low = max(1, i - max_distance)
+        high = min(len(b), i + max_distance)
+        current = [over] * (len(b) + 1)
+        if i <= max_distance:
+            current[0] = i
+
+        diagonal = previous[low - 1]
+        left = row_min = current[low - 1]
+        for j in range(low, high + 1):
+            value = diagonal if token == b[j - 1] else diagonal + 1
+            above = previous[j]
+            if above + 1 < value:
+                value = above + 1
+            if left + 1 < value:
+                value = left + 1
+            if value > over:
+                value = over
+            current[j] = value
+            if value < row_min:
+                row_min = value
+            diagonal = above
+            left = value
+        if row_min > max_distance:
+            return None
+        previous = current
+
+    distance = previous[len(b)]
+    return distance if distance <= max_distance else None
+
+
+def min_shared(gram_count, size, max_distance):
+    """Fewest n-grams a word within max_distance edits shares with the query
+
+    Each edit breaks at most `size` n-grams. Zero or less means the n-grams
+    prove nothing and a match may share none of them.
+    """
+    return gram_count - size * max_distance
+
+
+def find_similar(cursor, user_id, query_ids, limit=10, max_distance=None):
+    """A user's saved lexicon entries whose phonemes are close to query_ids
+
+    Candidates come from the n-gram index (restricted to the user's words)
+    ranked by shared n-grams; only those are re-ranked by bounded edit
+    distance. Returns [(lexicon_id, distance)] closest first.
+
+    Trigrams are used when they guarantee every word within max_distance
+    shares some of them, bigrams otherwise (short queries). Candidates must
+    share at least min_shared n-grams. A single-phoneme query, or a
+    max_distance large for the query length, leaves that bound at zero.
+    Words sharing no n-gram at all can then be missed.
+    """
+    query_ids = [i for i in query_ids if i not in IGNORED_IDS]
+    if not query_ids or limit < 1:
+        return []
+    if max_distance is None:
+        max_distance = max(1, len(query_ids) // 3)
+
+    size = NGRAM_SIZE
+    grams = ngrams(query_ids, size)
+    if min_shared(len(grams), size, max_distance) < 1:
+        size = SHORT_NGRAM_SIZE
+        grams = ngrams(query_ids, size)
+    grams = sorted(grams)
+
+    placeholders = ', '.join('?' * len(grams))
+    # Count shared n-grams first: far fewer entries reach the ownership check
+    cursor.execute(f'''
+        SELECT c.lexicon_id, c.shared, l.token_ids
+        FROM (
+            SELECT lexicon_id, COUNT(*) AS shared
+            FROM phoneme_ngrams
+            WHERE gram IN ({placeholders})
+            GROUP BY lexicon_id
+            HAVING shared >= ?
+        ) c
+        JOIN lexicon l ON l.id = c.lexicon_id
+        WHERE EXISTS (
+            SELECT 1 FROM arabic_words w
+            WHERE w.lexicon_id = c.lexicon_id AND w.user_id = ?
+        )
+        ORDER BY c.shared DESC
+        LIMIT ?
+    ''', (*grams, max(1, min_shared(len(grams), size, max_distance)), user_id, MAX_CANDIDATES))
+
+    matches = []
+    for row in cursor.fetchall():
+        distance = bounded_edit_distance(query_ids, parse_token_ids(row['token_ids']), max_distance)
+        if distance is None:
+            continue
+        bisect.insort(matches, (distance, -row['shared'], row['lexicon_id']))
+        if len(matches) > limit:
+            matches.pop()
+        # Anything further away than the current top `limit` can be cut off early
+        if len(matches) == limit:
+            max_distance = matches[-1][0]
+    return [(lexicon_id, distance) for distance, _, lexicon_id in matches]
@@ -0,0 +1,40 @@
+import text
+import metrics
+
+# Tokens the text package can turn into symbol ids
+KNOWN_TOKENS = frozenset(text.symbols)
+
+
+def arabic_token_ids(arabic):
+    """Token ids for an Arabic string, skipping tokens with no symbol (e.g. punctuation)"""
+    arabic = ' '.join(arabic.split())
+    if not arabic:
+        return []
+    with metrics.phonetiser_timer():
+        tokens = text.arabic_to_tokens(arabic)
+    return text.tokens_to_ids([token for token in tokens if token in KNOWN_TOKENS])
+
+
+def phonetise(arabic):
+    """Phoneme string and space-separated token ids of a word, as stored in the lexicon
+
+    Words the phonetiser cannot handle get empty strings, so they are
+    recorded as processed rather than retried forever.
+    """
+    arabic = ' '.join(arabic.split())
+    if not arabic:
+        return '', ''
+    try:
+        with metrics.phonetiser_timer():
+            phonemes = text.arabic_to_phonemes(arabic)
+            tokens = text.phonemes_to_tokens(phonemes)
+    except Exception as e:
+        print(f"Phonetiser error for {arabic!r}: {e}")
+        return '', ''
+    token_ids = text.tokens_to_ids([token for token in tokens if token in KNOWN_TOKENS])
+    return phonemes, ' '.join(map(str, token_ids))
+
+
+def phonetise_rows(rows):
+    """Phonetise (id, word) rows; returns (phonemes, token_ids, id) for executemany"""
+    return [(*phonetise(word), row_id) for row_id, word in rows]
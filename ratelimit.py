@@ -0,0 +1,304 @@
+import math
+import os
+import threading
+import time
+from functools import wraps
+
+from flask import jsonify
+
+import db
+import metrics
+
+# Seconds clients are told to wait when the in-flight budget is exhausted
+BUSY_RETRY_AFTER = 2
+
+# llm_buckets row shared by all users
+GLOBAL_BUCKET = 'global'
+
+# Per-attempt timeout and retries of the OpenAI client (see app.get_openai)
+LLM_CALL_TIMEOUT = float(os.getenv('LLM_CALL_TIMEOUT', 30))
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', 2))
+
+# A slot outliving every attempt plus retry backoff belongs to a crashed
+# worker and is reclaimed; a live call can never hold one this long
+SLOT_TTL = (LLM_MAX_RETRIES + 1) * LLM_CALL_TIMEOUT + 30
+
+# A queued call re-checks for slots freed by other workers, backing off
+SLOT_POLL_INTERVAL = 0.05
+SLOT_POLL_MAX_INTERVAL = 1.0
+
+
+class RateLimited(Exception):
+    """Raised when a call is over budget"""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, holding at most `burst`"""
+
+    def __init__(self, rate, burst, tokens=None, updated=None):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst) if tokens is None else tokens
+        self.updated = time.time() if updated is None else updated
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + max(0, now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now):
+        """Take one token; return 0 on success or the seconds until one is available"""
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def refund(self, now):
+        self._refill(now)
+        self.tokens = min(self.burst, self.tokens + 1)
+
+
+class LLMBudget:
+    """Per-user and global token buckets plus a cap on in-flight completions
+
+    Buckets and in-flight slots live in SQLite (llm_buckets/llm_inflight,
+    created by init-db), so all worker processes share the same limits.
+    Only the wait queue for a free slot is per process.
+    """
+
+    def __init__(self, user_rate_per_min, user_burst, global_rate_per_min, global_burst,
+                 max_inflight, max_queue, queue_timeout):
+        self.user_rate = user_rate_per_min / 60
+        self.user_burst = user_burst
+        self.global_rate = global_rate_per_min / 60
+        self.global_burst = global_burst
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self.waiting = 0
+        self.rejected = {}
+        self._lock = threading.Lock()
+        self._slot_free = threading.Condition(self._lock)
+
+    @classmethod
+    def from_env(cls):
+        """Build a budget from LLM_* environment variables"""
+        return cls(
+            user_rate_per_min=float(os.getenv('LLM_USER_RATE_PER_MIN', 20)),
+            user_burst=int(os.getenv('LLM_USER_BURST', 5)),
+            global_rate_per_min=float(os.getenv('LLM_GLOBAL_RATE_PER_MIN', 300)),
+            global_burst=int(os.getenv('LLM_GLOBAL_BURST', 20)),
+            max_inflight=int(os.getenv('LLM_MAX_INFLIGHT', 8)),
+            max_queue=int(os.getenv('LLM_MAX_QUEUE', 16)),
+            queue_timeout=float(os.getenv('LLM_QUEUE_TIMEOUT', 10)),
+        )
+
+    def _reject(self, reason, retry_after):
+        with self._lock:
+            self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        metrics.LLM_REJECTIONS.labels(reason).inc()
+        raise RateLimited(reason, retry_after)
+
+    def _buckets(self, user_id):
+        """(row name, rate, burst) of the buckets a call is charged to"""
+        buckets = []
+        if self.user_rate:
+            buckets.append((f'user:{user_id}', self.user_rate, self.user_burst))
+        if self.global_rate:
+            buckets.append((GLOBAL_BUCKET, self.global_rate, self.global_burst))
+        return buckets
+
+    def _load_bucket(self, cursor, name, rate, burst, now):
+        cursor.execute('SELECT tokens, updated FROM llm_buckets WHERE name = ?', (name,))
+        row = cursor.fetchone()
+        if row is None:
+            return TokenBucket(rate, burst, updated=now)
+        return TokenBucket(rate, burst, row['tokens'], row['updated'])
+
+    def _charge(self, user_id, refund=False):
+        """Take (or give back) one token from the user's and the global bucket
+
+        All or nothing: returns (reason, seconds to wait) for the first empty
+        bucket without taking anything, or None.
+        """
+        now = time.time()
+        conn = db.get_db()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            updated = []
+            for name, rate, burst in self._buckets(user_id):
+                bucket = self._load_bucket(cursor, name, rate, burst, now)
+                if refund:
+                    bucket.refund(now)
+                else:
+                    wait = bucket.take(now)
+                    if wait:
+                        conn.rollback()
+                        return ('global_rate' if name == GLOBAL_BUCKET else 'user_rate'), wait
+                updated.append((name, bucket.tokens, bucket.updated))
+
+            cursor.executemany('''
+                INSERT INTO llm_buckets (name, tokens, updated) VALUES (?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated
+            ''', updated)
+            # A user idle long enough to have a full bucket again needs no row
+            if self.user_rate:
+                cursor.execute('DELETE FROM llm_buckets WHERE name != ? AND updated < ?',
+                               (GLOBAL_BUCKET, now - self.user_burst / self.user_rate))
+            conn.commit()
+            return None
+        finally:
+            conn.close()
+
+    def _take_slot(self):
+        """Claim an in-flight slot unless max_inflight are taken; return its id or None
+
+        A plain read rules out the common busy case, so the write lock
+        (shared with word saves) is only taken when a slot looks free.
+        """
+        now = time.time()
+        conn = db.get_db()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('SELECT COUNT(*) FROM llm_inflight WHERE started >= ?', (now - SLOT_TTL,))
+            if cursor.fetchone()[0] >= self.max_inflight:
+                return None
+
+            cursor.execute('BEGIN IMMEDIATE')
+            # Slots of a crashed worker are never released, so they expire
+            cursor.execute('DELETE FROM llm_inflight WHERE started < ?', (now - SLOT_TTL,))
+            cursor.execute('SELECT COUNT(*) FROM llm_inflight')
+            slot_id = None
+            if cursor.fetchone()[0] < self.max_inflight:
+                cursor.execute('INSERT INTO llm_inflight (pid, started) VALUES (?, ?)', (os.getpid(), now))
+                slot_id = cursor.lastrowid
+            conn.commit()
+            return slot_id
+        finally:
+            conn.close()
+
+    def _wait_for_slot(self):
+        """Poll for a slot until queue_timeout; other workers' releases aren't signalled here"""
+        deadline = time.monotonic() + self.queue_timeout
+        interval = SLOT_POLL_INTERVAL
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            with self._lock:
+                self._slot_free.wait(min(interval, remaining))
+            interval = min(interval * 2, SLOT_POLL_MAX_INTERVAL)
+            slot_id = self._take_slot()
+            if slot_id is not None:
+                return slot_id
+
+    def acquire(self, user_id):
+        """Take rate-limit tokens and an in-flight slot, waiting in a bounded queue
+
+        Returns the slot id to hand back to release().
+        """
+        limited = self._charge(user_id)
+        if limited:
+            self._reject(*limited)
+
+        slot_id = self._take_slot()
+        if slot_id is None:
+            with self._lock:
+                queue_full = self.waiting >= self.max_queue
+                if not queue_full:
+                    self.waiting += 1
+            if queue_full:
+                self._charge(user_id, refund=True)
+                self._reject('queue_full', BUSY_RETRY_AFTER)
+
+            metrics.LLM_QUEUE_DEPTH.inc()
+            try:
+                slot_id = self._wait_for_slot()
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+                metrics.LLM_QUEUE_DEPTH.dec()
+            if slot_id is None:
+                self._charge(user_id, refund=True)
+                self._reject('queue_timeout', BUSY_RETRY_AFTER)
+
+        metrics.LLM_INFLIGHT.inc()
+        return slot_id
+
+    def release(self, slot_id):
+        conn = db.get_db()
+        try:
+            conn.execute('DELETE FROM llm_inflight WHERE id = ?', (slot_id,))
+            conn.commit()
+        finally:
+            conn.close()
+        metrics.LLM_INFLIGHT.dec()
+        with self._lock:
+            self._slot_free.notify()
+
+    def limit(self, user_id_func):
+        """Decorator answering 429 with Retry-After when the budget is exhausted"""
+        def decorator(f):
+            @wraps(f)
+            def decorated(*args, **kwargs):
+                try:
+                    slot_id = self.acquire(user_id_func())
+                except RateLimited as e:
+                    retry_after = max(1, math.ceil(e.retry_after))
+                    response = jsonify({
+                        'error': 'Too many translation requests, please retry shortly',
+                        'reason': e.reason,
+                        'retry_after': retry_after
+                    })
+                    response.status_code = 429
+                    response.headers['Retry-After'] = str(retry_after)
+                    return response
+                try:
+                    return f(*args, **kwargs)
+                finally:
+                    self.release(slot_id)
+            return decorated
+        return decorator
+
+    def stats(self):
+        """Current limits and usage; `waiting` and `rejected` cover this process only"""
+        now = time.time()
+        conn = db.get_db()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('SELECT COUNT(*) FROM llm_inflight WHERE started >= ?', (now - SLOT_TTL,))
+            inflight = cursor.fetchone()[0]
+            cursor.execute('SELECT COUNT(*) FROM llm_buckets WHERE name != ?', (GLOBAL_BUCKET,))
+            tracked_users = cursor.fetchone()[0]
+            global_tokens = None
+            if self.global_rate:
+                bucket = self._load_bucket(cursor, GLOBAL_BUCKET, self.global_rate, self.global_burst, now)
+                bucket._refill(now)
+                global_tokens = round(bucket.tokens, 2)
+        finally:
+            conn.close()
+
+        with self._lock:
+            return {
+                'limits': {
+                    'user_rate_per_min': self.user_rate * 60,
+                    'user_burst': self.user_burst,
+                    'global_rate_per_min': self.global_rate * 60,
+                    'global_burst': self.global_burst if self.global_rate else 0,
+                    'max_inflight': self.max_inflight,
+                    'max_queue': self.max_queue,
+                    'queue_timeout': self.queue_timeout,
+                },
+                'inflight': inflight,
+                'waiting': self.waiting,
+                'global_tokens_available': global_tokens,
+                'tracked_users': tracked_users,
+                'rejected': dict(self.rejected),
+            }
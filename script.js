@@ -23,6 +23,11 @@ let totalPages = 1;
 let wordsPerPage = 10;
 let currentSearch = '';
 
+// Sync State: words on screen and the change version they reflect
+let currentWords = [];
+let totalWords = 0;
+let listVersion = null;
+
 // Initialize app
 window.addEventListener('load', () => {
     checkAuth();
@@ -117,7 +122,12 @@ async function translateAndAdd() {
         });
         
         const translateResult = await translateResponse.json();
-        
+
+        if (translateResponse.status === 429) {
+            alert(`Too many translations right now. Please try again in ${translateResult.retry_after} seconds.`);
+            return;
+        }
+
         if (!translateResult.success) {
             throw new Error('Translation failed');
         }
@@ -145,10 +155,10 @@ async function translateAndAdd() {
             throw new Error('Failed to save word');
         }
         
-        // Step 3: Clear input and reload list
+        // Step 3: Clear input and patch the new word into the list
         arabicInput.value = '';
         arabicInput.focus();
-        await loadWordList();
+        await syncWordList(1, '');
         
     } catch (error) {
         console.error('Error:', error);
@@ -192,6 +202,11 @@ async function loadWordList(page = 1, search = '') {
         totalPages = Math.ceil(total / wordsPerPage) || 1;
         currentSearch = search;
         
+        // Update sync state
+        currentWords = words;
+        totalWords = total;
+        listVersion = result.version ?? null;
+        
         // Render word list
         renderWordList(words);
         updatePagination();
@@ -207,6 +222,80 @@ async function loadWordList(page = 1, search = '') {
     }
 }
 
+// Render one word as a mobile card
+function renderWordCard(word) {
+    return `
+        <div class="vocab-card" data-word-id="${word.id}">
+            <div class="card-header">
+                <button class="audio-btn" onclick="playAudio('${word.word}', ${word.id})" title="Play audio">
+                    <span class="material-symbols-outlined">volume_up</span>
+                </button>
+                <div class="card-arabic-word">${word.word}</div>
+                <button class="delete-btn" onclick="deleteWord(${word.id})" title="Delete">
+                    <span class="material-symbols-outlined">delete</span>
+                </button>
+            </div>
+            <div class="card-body">
+                <div class="word-info-row">
+                    <div class="info-column">
+                        <div class="label">Phonetic</div>
+                        <div class="phonetic">${word.phonetic || ''}</div>
+                    </div>
+                    <div class="info-column">
+                        <div class="label">English</div>
+                        <div class="meaning">${word.translation}</div>
+                    </div>
+                </div>
+                
+                ${word.sentence || word.arabic_sentence ? `
+                    <div class=\"label\" style=\"text-align: center;\">Example</div>
+                    <div class=\"example-box\">
+                        ${word.arabic_sentence ? `
+                            <div class=\"example-ar-container\">
+                                <div class=\"example-ar\">${word.arabic_sentence}</div>
+                                <button class=\"example-audio-btn\" onclick=\"playAudio('${word.arabic_sentence.replace(/'/g, "\\'")}', ${word.id})\" title=\"Play example\">
+                                    <span class=\"material-symbols-outlined\">volume_up</span>
+                                </button>
+                            </div>
+                        ` : ''}
+                        ${word.sentence ? `<div class=\"example-en\">${word.sentence}</div>` : ''}
+                    </div>
+                ` : ''}
+            </div>
+        </div>
+    `;
+}
+
+// Render one word as a desktop table row
+function renderWordRow(word) {
+    return `
+        <tr data-word-id="${word.id}">
+            <td class="actions-cell">
+                <button class="table-btn audio-table-btn" onclick="playAudio('${word.word}', ${word.id})" title="Play word">
+                    <span class="material-symbols-outlined">volume_up</span>
+                </button>
+            </td>
+            <td class="arabic-cell">${word.word}</td>
+            <td class="phonetic-cell">${word.phonetic || '-'}</td>
+            <td class="english-cell">${word.translation}</td>
+            <td class="actions-cell">
+                ${word.arabic_sentence ? `
+                    <button class="table-btn audio-table-btn" onclick="playAudio('${word.arabic_sentence.replace(/'/g, "\\'")}', ${word.id})" title="Play example">
+                        <span class="material-symbols-outlined">volume_up</span>
+                    </button>
+                ` : ''}
+            </td>
+            <td class="arabic-cell">${word.arabic_sentence || '-'}</td>
+            <td>${word.sentence || '-'}</td>
+            <td class="actions-cell">
+                <button class="table-btn delete-table-btn" onclick="deleteWord(${word.id})" title="Delete">
+                    <span class="material-symbols-outlined">delete</span>
+                </button>
+            </td>
+        </tr>
+    `;
+}
+
 // Render Word List
 function renderWordList(words) {
     if (words.length === 0) {
@@ -220,48 +309,7 @@ function renderWordList(words) {
     }
     
     // Mobile card view
-    const cardView = words.map(word => {
-        return `
-            <div class="vocab-card">
-                <div class="card-header">
-                    <button class="audio-btn" onclick="playAudio('${word.word}', ${word.id})" title="Play audio">
-                        <span class="material-symbols-outlined">volume_up</span>
-                    </button>
-                    <div class="card-arabic-word">${word.word}</div>
-                    <button class="delete-btn" onclick="deleteWord(${word.id})" title="Delete">
-                        <span class="material-symbols-outlined">delete</span>
-                    </button>
-                </div>
-                <div class="card-body">
-                    <div class="word-info-row">
-                        <div class="info-column">
-                            <div class="label">Phonetic</div>
-                            <div class="phonetic">${word.phonetic || ''}</div>
-                        </div>
-                        <div class="info-column">
-                            <div class="label">English</div>
-                            <div class="meaning">${word.translation}</div>
-                        </div>
-                    </div>
-                    
-                    ${word.sentence || word.arabic_sentence ? `
-                        <div class=\"label\" style=\"text-align: center;\">Example</div>
-                        <div class=\"example-box\">
-                            ${word.arabic_sentence ? `
-                                <div class=\"example-ar-container\">
-                                    <div class=\"example-ar\">${word.arabic_sentence}</div>
-                                    <button class=\"example-audio-btn\" onclick=\"playAudio('${word.arabic_sentence.replace(/'/g, "\\'")}', ${word.id})\" title=\"Play example\">
-                                        <span class=\"material-symbols-outlined\">volume_up</span>
-                                    </button>
-                                </div>
-                            ` : ''}
-                            ${word.sentence ? `<div class=\"example-en\">${word.sentence}</div>` : ''}
-                        </div>
-                    ` : ''}
-                </div>
-            </div>
-        `;
-    }).join('');
+    const cardView = words.map(renderWordCard).join('');
     
     // Desktop list view
     const listView = `
@@ -279,32 +327,7 @@ function renderWordList(words) {
                 </tr>
             </thead>
             <tbody>
-                ${words.map(word => `
-                    <tr>
-                        <td class="actions-cell">
-                            <button class="table-btn audio-table-btn" onclick="playAudio('${word.word}', ${word.id})" title="Play word">
-                                <span class="material-symbols-outlined">volume_up</span>
-                            </button>
-                        </td>
-                        <td class="arabic-cell">${word.word}</td>
-                        <td class="phonetic-cell">${word.phonetic || '-'}</td>
-                        <td class="english-cell">${word.translation}</td>
-                        <td class="actions-cell">
-                            ${word.arabic_sentence ? `
-                                <button class="table-btn audio-table-btn" onclick="playAudio('${word.arabic_sentence.replace(/'/g, "\\'")}', ${word.id})" title="Play example">
-                                    <span class="material-symbols-outlined">volume_up</span>
-                                </button>
-                            ` : ''}
-                        </td>
-                        <td class="arabic-cell">${word.arabic_sentence || '-'}</td>
-                        <td>${word.sentence || '-'}</td>
-                        <td class="actions-cell">
-                            <button class="table-btn delete-table-btn" onclick="deleteWord(${word.id})" title="Delete">
-                                <span class="material-symbols-outlined">delete</span>
-                            </button>
-                        </td>
-                    </tr>
-                `).join('')}
+                ${words.map(renderWordRow).join('')}
             </tbody>
         </table>
     `;
@@ -315,6 +338,94 @@ function renderWordList(words) {
     `;
 }
 
+// Patch the list with words added/deleted since it was loaded,
+// falling back to loading `page` when patching isn't possible
+async function syncWordList(page, search) {
+    if (listVersion === null) {
+        await loadWordList(page, search);
+        return;
+    }
+    
+    try {
+        const response = await fetch(`${API_URL}/words/changes?since=${listVersion}`, {
+            credentials: 'include'
+        });
+        const result = await response.json();
+        
+        if (!result.success) {
+            throw new Error('Failed to load changes');
+        }
+        
+        const knownIds = new Set(currentWords.map(word => word.id));
+        const deletedIds = new Set(result.deleted || []);
+        // Newest first, like the list itself
+        const added = (result.inserted || []).filter(word => !knownIds.has(word.id)).reverse();
+        
+        // New words only belong at the top of the unfiltered first page, and a
+        // filtered page can't tell whether deleted words elsewhere matched
+        const canPatch = !result.reset
+            && (added.length === 0 || (currentPage === 1 && !currentSearch))
+            && (!currentSearch || [...deletedIds].every(id => knownIds.has(id)));
+        
+        if (!canPatch) {
+            await loadWordList(page, search);
+            return;
+        }
+        
+        listVersion = result.version;
+        totalWords += added.length - deletedIds.size;
+        totalPages = Math.ceil(totalWords / wordsPerPage) || 1;
+        
+        const remaining = currentWords.filter(word => !deletedIds.has(word.id));
+        currentWords = added.concat(remaining).slice(0, wordsPerPage);
+        
+        const shownBefore = (currentPage - 1) * wordsPerPage;
+        if (currentWords.length < wordsPerPage && totalWords > shownBefore + currentWords.length) {
+            // Deletes pulled words up from later pages (or emptied this one);
+            // reload so they aren't skipped, or show the nearest page
+            await loadWordList(Math.min(currentPage, totalPages), currentSearch);
+            return;
+        }
+        
+        patchWordList(added, deletedIds);
+        updatePagination();
+        
+    } catch (error) {
+        console.error('Error syncing words:', error);
+        await loadWordList(page, search);
+    }
+}
+
+// Apply added/deleted words to the rendered list without re-rendering it
+function patchWordList(added, deletedIds) {
+    const cards = wordListDiv.querySelector('.card-view-container');
+    const rows = wordListDiv.querySelector('.word-table tbody');
+    
+    // Nothing rendered to patch (e.g. empty state), or nothing left to show
+    if (!cards || !rows || currentWords.length === 0) {
+        renderWordList(currentWords);
+        return;
+    }
+    
+    deletedIds.forEach(id => {
+        wordListDiv.querySelectorAll(`[data-word-id="${id}"]`).forEach(el => el.remove());
+    });
+    
+    // Insert oldest first so the newest ends up on top
+    added.slice().reverse().forEach(word => {
+        cards.insertAdjacentHTML('afterbegin', renderWordCard(word));
+        rows.insertAdjacentHTML('afterbegin', renderWordRow(word));
+    });
+    
+    // Drop words pushed past the end of the page
+    const visibleIds = new Set(currentWords.map(word => String(word.id)));
+    wordListDiv.querySelectorAll('[data-word-id]').forEach(el => {
+        if (!visibleIds.has(el.dataset.wordId)) {
+            el.remove();
+        }
+    });
+}
+
 // Update Pagination Controls
 function updatePagination() {
     prevBtn.disabled = currentPage === 1;
@@ -340,8 +451,8 @@ async function deleteWord(wordId) {
             throw new Error('Failed to delete word');
         }
         
-        // Reload current page
-        await loadWordList(currentPage, currentSearch);
+        // Remove it from the current page
+        await syncWordList(currentPage, currentSearch);
         
     } catch (error) {
         console.error('Error deleting word:', error);
@@ -349,18 +460,40 @@ async function deleteWord(wordId) {
     }
 }
 
-// Play Audio (placeholder for future implementation)
-function playAudio(arabicWord, wordId) {
-    // TODO: Implement text-to-speech or audio playback
-    console.log('Play audio for:', arabicWord);
-    alert('Audio playback coming soon!');
-}
+// Clip URLs already resolved, keyed by Arabic text
+const audioUrls = new Map();
 
-// Play Audio (placeholder for future implementation)
-function playAudio(arabicWord, wordId) {
-    // TODO: Implement text-to-speech or audio playback
-    console.log('Play audio for:', arabicWord);
-    alert('Audio playback coming soon!');
+// Play Audio
+async function playAudio(arabicText, wordId) {
+    try {
+        let url = audioUrls.get(arabicText);
+        
+        if (!url) {
+            const params = new URLSearchParams({ text: arabicText });
+            const response = await fetch(`${API_URL}/audio?${params}`, {
+                credentials: 'include'
+            });
+            const result = await response.json();
+            
+            if (response.status === 400) {
+                alert(result.error);
+                return;
+            }
+            
+            if (!result.ready) {
+                alert('Audio is still being prepared. Please try again in a moment.');
+                return;
+            }
+            
+            url = result.url;
+            audioUrls.set(arabicText, url);
+        }
+        
+        await new Audio(url).play();
+        
+    } catch (error) {
+        console.error('Error playing audio:', error);
+    }
 }
 
 // Search Handler (debounced)
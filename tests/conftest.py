@@ -0,0 +1,80 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import audio
+import db
+from app import create_app
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """Point db.get_db() at an empty database file"""
+    path = str(tmp_path / 'test.db')
+    monkeypatch.setattr(db, 'DATABASE', path)
+    monkeypatch.setattr(audio, 'AUDIO_DIR', str(tmp_path / 'audio'))
+    monkeypatch.setattr(audio, '_worker', None)
+    yield path
+    # Finish queued clips while AUDIO_DIR still points at tmp_path
+    if audio._worker is not None:
+        audio._worker.close()
+
+
+@pytest.fixture
+def app(database, monkeypatch):
+    monkeypatch.setenv('ENABLE_TEST_LOGIN', '1')
+    monkeypatch.delenv('WRITE_BEHIND', raising=False)
+    app = create_app()
+    app.secret_key = 'test'
+    app.testing = True
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login(client, sub):
+    response = client.post('/_test/login', json={'sub': sub})
+    assert response.status_code == 200
+
+
+def save_words(client, words, session_id='s1'):
+    response = client.post('/api/words', json={
+        'words': [{'word': word, 'translation': f'{word}-en'} for word in words],
+        'sessionId': session_id,
+    })
+    assert response.status_code == 200
+
+
+def create_baseline_db(path, rows):
+    """A database in the original single-table layout, user_id added by ALTER TABLE
+
+    `rows` are (word, translation, session_id, user_id) tuples.
+    """
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE arabic_words (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            word TEXT NOT NULL,
+            translation TEXT,
+            phonetic TEXT,
+            sentence TEXT,
+            arabic_sentence TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            session_id TEXT
+        )
+    ''')
+    conn.execute('ALTER TABLE arabic_words ADD COLUMN user_id TEXT')
+    conn.executemany(
+        'INSERT INTO arabic_words (word, translation, phonetic, sentence, arabic_sentence, session_id, user_id) '
+        "VALUES (?, ?, '', '', '', ?, ?)",
+        rows
+    )
+    conn.commit()
+    conn.close()
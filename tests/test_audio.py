@@ -0,0 +1,69 @@
+import threading
+import time
+
+import pytest
+
+import audio
+import db
+from conftest import login
+
+
+class BlockedSynthesizer:
+    """Never finishes, so queued clips stay queued"""
+
+    name = 'blocked'
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def synthesize(self, token_ids):
+        self.release.wait()
+        return b''
+
+
+@pytest.fixture
+def blocked_worker(database, monkeypatch):
+    synthesizer = BlockedSynthesizer()
+    worker = audio.AudioWorker(synthesizer, max_queue=2)
+    monkeypatch.setattr(audio, '_worker', worker)
+    # Occupy the thread so later clips stay in the queue
+    worker.submit([5])
+    while not worker.queue.empty():
+        time.sleep(0.001)
+    yield worker
+    synthesizer.release.set()
+    worker.close()
+
+
+def test_full_queue_refuses_new_clips(blocked_worker):
+    blocked_worker.submit([6])
+    blocked_worker.submit([7])
+    with pytest.raises(audio.QueueFull):
+        blocked_worker.submit([8])
+    assert len(blocked_worker.pending) == 3
+
+
+def test_audio_endpoint_answers_503_when_busy(client, blocked_worker):
+    db.init_db()
+    login(client, 'u1')
+    for text in ('كتاب', 'باب'):
+        client.get('/api/audio', query_string={'text': text})
+
+    response = client.get('/api/audio', query_string={'text': 'شمس'})
+    assert response.status_code == 503
+    assert response.headers['Retry-After']
+
+
+def test_audio_endpoint_rejects_long_text(database, client):
+    login(client, 'u1')
+    response = client.get('/api/audio', query_string={'text': 'ب' * (audio.MAX_TEXT_LENGTH + 1)})
+    assert response.status_code == 400
+
+
+def test_empty_synthesizer_output_is_not_stored(database):
+    worker = audio.AudioWorker(BlockedSynthesizer())
+    worker.synthesizer.release.set()
+    key = worker.submit([6])
+    worker.close()
+
+    assert not audio.clip_exists(key)
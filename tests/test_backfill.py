@@ -0,0 +1,106 @@
+import backfill
+import db
+import phonetics
+from conftest import create_baseline_db
+
+WORDS = ['كتاب', 'قلم', 'باب', 'بيت', 'شمس']
+
+
+def lexicon_phonemes():
+    conn = db.get_db()
+    rows = conn.execute('SELECT word, phonemes FROM lexicon').fetchall()
+    conn.close()
+    return {row['word']: row['phonemes'] for row in rows}
+
+
+def checkpoint():
+    conn = db.get_db()
+    last_id, rows_done = backfill.get_checkpoint(conn.cursor(), backfill.JOB_NAME)
+    conn.close()
+    return last_id, rows_done
+
+
+def set_phonemes_null(word):
+    conn = db.get_db()
+    conn.execute('UPDATE lexicon SET phonemes = NULL, token_ids = NULL WHERE word = ?', (word,))
+    conn.commit()
+    conn.close()
+
+
+def add_lexicon_rows(words):
+    conn = db.get_db()
+    conn.executemany('INSERT INTO lexicon (word) VALUES (?)', [(word,) for word in words])
+    conn.commit()
+    conn.close()
+
+
+def test_backfill_fills_phonemes_and_ngram_index(database):
+    create_baseline_db(database, [(word, f'{word}-en', 's1', 'u1') for word in WORDS])
+    db.init_db()
+
+    stats = backfill.run_backfill(chunk_size=2, workers=1)
+    assert stats['rows'] == len(WORDS)
+    assert all(lexicon_phonemes().values())
+
+    conn = db.get_db()
+    indexed = {row[0] for row in conn.execute('SELECT DISTINCT lexicon_id FROM phoneme_ngrams')}
+    lexicon_ids = {row[0] for row in conn.execute('SELECT id FROM lexicon')}
+    max_id = conn.execute('SELECT MAX(id) FROM lexicon').fetchone()[0]
+    conn.close()
+    assert indexed == lexicon_ids
+    assert checkpoint() == (max_id, len(WORDS))
+
+
+def test_second_run_resumes_from_checkpoint(database):
+    create_baseline_db(database, [(word, f'{word}-en', 's1', 'u1') for word in WORDS[:3]])
+    db.init_db()
+    backfill.run_backfill(chunk_size=2, workers=1)
+
+    # An old row losing its phonemes lies before the checkpoint and is not revisited
+    set_phonemes_null(WORDS[0])
+    add_lexicon_rows(WORDS[3:])
+
+    stats = backfill.run_backfill(chunk_size=2, workers=1)
+    assert stats['rows'] == 2
+    assert stats['total_rows_done'] == 5
+
+    phonemes = lexicon_phonemes()
+    assert phonemes[WORDS[0]] is None
+    assert all(phonemes[word] for word in WORDS[1:])
+
+
+def test_restart_resets_checkpoint(database):
+    create_baseline_db(database, [(word, f'{word}-en', 's1', 'u1') for word in WORDS])
+    db.init_db()
+    backfill.run_backfill(chunk_size=2, workers=1)
+    set_phonemes_null(WORDS[0])
+
+    stats = backfill.run_backfill(chunk_size=2, workers=1, restart=True)
+    assert stats['rows'] == 1
+    assert stats['total_rows_done'] == 1
+    assert lexicon_phonemes()[WORDS[0]]
+
+
+def test_phonetiser_failures_are_stored_empty_and_not_retried(database, monkeypatch):
+    create_baseline_db(database, [(word, f'{word}-en', 's1', 'u1') for word in WORDS])
+    db.init_db()
+
+    arabic_to_phonemes = phonetics.text.arabic_to_phonemes
+
+    def failing_arabic_to_phonemes(arabic):
+        if arabic == WORDS[1]:
+            raise ValueError('unsupported word')
+        return arabic_to_phonemes(arabic)
+
+    # Workers are forked, so they inherit the patched phonetiser
+    monkeypatch.setattr(phonetics.text, 'arabic_to_phonemes', failing_arabic_to_phonemes)
+    stats = backfill.run_backfill(chunk_size=2, workers=1)
+    assert stats['rows'] == len(WORDS)
+    phonemes = lexicon_phonemes()
+    assert phonemes[WORDS[1]] == ''
+    assert all(phonemes[word] for word in WORDS if word != WORDS[1])
+
+    monkeypatch.setattr(phonetics.text, 'arabic_to_phonemes', arabic_to_phonemes)
+    stats = backfill.run_backfill(chunk_size=2, workers=1, restart=True)
+    assert stats['rows'] == 0
+    assert lexicon_phonemes()[WORDS[1]] == ''
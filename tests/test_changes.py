@@ -0,0 +1,101 @@
+import pytest
+
+import app as app_module
+import db
+from conftest import login, save_words
+
+
+@pytest.fixture
+def user(database, client):
+    db.init_db()
+    login(client, 'u1')
+    return client
+
+
+def list_words(client):
+    result = client.get('/api/words?limit=1000').get_json()
+    return result['version'], {word['word']: word['id'] for word in result['words']}
+
+
+def changes(client, since):
+    response = client.get(f'/api/words/changes?since={since}')
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_inserted_and_deleted_since_version(user):
+    save_words(user, ['كتاب', 'باب'])
+    version, ids = list_words(user)
+
+    save_words(user, ['قمر'])
+    user.delete(f"/api/words/{ids['باب']}")
+
+    result = changes(user, version)
+    assert result['reset'] is False
+    assert [word['word'] for word in result['inserted']] == ['قمر']
+    assert result['deleted'] == [ids['باب']]
+    assert result['version'] > version
+
+
+def test_word_added_and_deleted_since_version_is_not_reported(user):
+    save_words(user, ['كتاب'])
+    version, _ = list_words(user)
+
+    save_words(user, ['قمر'])
+    _, ids = list_words(user)
+    user.delete(f"/api/words/{ids['قمر']}")
+
+    result = changes(user, version)
+    assert result['inserted'] == []
+    assert result['deleted'] == []
+
+
+def test_other_users_changes_are_not_reported(user):
+    version, _ = list_words(user)
+    login(user, 'u2')
+    save_words(user, ['قمر'])
+    login(user, 'u1')
+
+    result = changes(user, version)
+    assert result['inserted'] == []
+    assert result['deleted'] == []
+
+
+def test_version_from_the_future_resets(user):
+    save_words(user, ['كتاب'])
+    version, _ = list_words(user)
+    assert changes(user, version + 10)['reset'] is True
+
+
+def test_too_many_deletions_reset(user, monkeypatch):
+    monkeypatch.setattr(app_module, 'MAX_SYNC_CHANGES', 3)
+    save_words(user, ['كتاب', 'باب', 'قمر', 'شمس'])
+    version, _ = list_words(user)
+
+    user.delete('/api/words')
+
+    assert changes(user, version)['reset'] is True
+
+
+def test_since_older_than_pruned_tombstones_resets(user):
+    save_words(user, ['كتاب', 'باب', 'قمر'])
+    old_version, ids = list_words(user)
+    user.delete(f"/api/words/{ids['كتاب']}")
+    deleted_version, _ = list_words(user)
+
+    conn = db.get_db()
+    conn.execute("UPDATE word_tombstones SET deleted_at = datetime('now', '-1 year')")
+    conn.commit()
+    conn.close()
+
+    # Pruning happens alongside the next delete
+    user.delete(f"/api/words/{ids['باب']}")
+
+    assert changes(user, old_version)['reset'] is True
+    result = changes(user, deleted_version)
+    assert result['reset'] is False
+    assert result['deleted'] == [ids['باب']]
+
+    conn = db.get_db()
+    assert conn.execute('SELECT COUNT(*) FROM word_tombstones').fetchone()[0] == 1
+    conn.close()
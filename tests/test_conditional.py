@@ -0,0 +1,138 @@
+import gzip
+import os
+
+import pytest
+
+import compression
+import db
+from conftest import login, save_words
+
+
+def test_matching_etag_is_answered_with_304(database, client):
+    db.init_db()
+    login(client, 'u1')
+    save_words(client, ['كتاب'])
+
+    first = client.get('/api/words')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+
+    second = client.get('/api/words', headers={'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.headers['ETag'] == etag
+    assert second.data == b''
+
+
+def test_save_and_delete_change_the_etag(database, client):
+    db.init_db()
+    login(client, 'u1')
+    save_words(client, ['كتاب'])
+    before_save = client.get('/api/words')
+
+    save_words(client, ['قلم'])
+    after_save = client.get('/api/words', headers={'If-None-Match': before_save.headers['ETag']})
+    assert after_save.status_code == 200
+    assert after_save.headers['ETag'] != before_save.headers['ETag']
+
+    word_id = after_save.get_json()['words'][0]['id']
+    assert client.delete(f'/api/words/{word_id}').status_code == 200
+    after_delete = client.get('/api/words', headers={'If-None-Match': after_save.headers['ETag']})
+    assert after_delete.status_code == 200
+    assert after_delete.headers['ETag'] != after_save.headers['ETag']
+    assert after_delete.get_json()['total'] == 1
+
+
+def test_global_etag_changes_when_another_user_writes(database, app):
+    db.init_db()
+    reader = app.test_client()
+    writer = app.test_client()
+    login(reader, 'u1')
+    login(writer, 'u2')
+
+    first = reader.get('/api/stats')
+    assert reader.get('/api/stats', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    save_words(writer, ['كتاب'])
+    second = reader.get('/api/stats', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200
+    assert second.headers['ETag'] != first.headers['ETag']
+    assert second.get_json()['stats']['total_words'] == 1
+
+
+@pytest.fixture
+def large_word_list(database, client):
+    """Enough saved words for GET /api/words to exceed MIN_COMPRESS_SIZE"""
+    db.init_db()
+    login(client, 'u1')
+    save_words(client, [f'كلمة{i}' for i in range(20)])
+    plain = client.get('/api/words?limit=20')
+    assert len(plain.data) >= compression.MIN_COMPRESS_SIZE
+    assert 'Content-Encoding' not in plain.headers
+    return plain
+
+
+def test_large_json_is_gzipped(client, large_word_list, monkeypatch):
+    monkeypatch.setattr(compression, 'brotli', None)
+    response = client.get('/api/words?limit=20', headers={'Accept-Encoding': 'br, gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert gzip.decompress(response.data) == large_word_list.data
+
+
+def test_large_json_prefers_brotli(client, large_word_list):
+    brotli = pytest.importorskip('brotli')
+    response = client.get('/api/words?limit=20', headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(response.data) == large_word_list.data
+
+
+def test_small_json_is_not_compressed(database, client):
+    db.init_db()
+    login(client, 'u1')
+    response = client.get('/api/words', headers={'Accept-Encoding': 'gzip'})
+    assert len(response.data) < compression.MIN_COMPRESS_SIZE
+    assert 'Content-Encoding' not in response.headers
+
+
+@pytest.fixture
+def static_folder(app, tmp_path):
+    """A static folder holding script.js with up-to-date .gz and .br variants"""
+    folder = tmp_path / 'static'
+    folder.mkdir()
+    source = b'console.log("hello");\n' * 50
+    (folder / 'script.js').write_bytes(source)
+    (folder / 'script.js.gz').write_bytes(gzip.compress(source))
+    (folder / 'script.js.br').write_bytes(b'brotli bytes')
+    app.static_folder = str(folder)
+    return folder
+
+
+@pytest.mark.parametrize('accept, encoding, suffix', [
+    ('gzip, br', 'br', '.br'),
+    ('gzip', 'gzip', '.gz'),
+])
+def test_static_serves_precompressed_variant(client, static_folder, accept, encoding, suffix):
+    response = client.get('/script.js', headers={'Accept-Encoding': accept})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == encoding
+    assert response.mimetype in ('application/javascript', 'text/javascript')
+    assert response.data == (static_folder / f'script.js{suffix}').read_bytes()
+
+
+def test_static_ignores_stale_variant(client, static_folder):
+    source = static_folder / 'script.js'
+    mtime = source.stat().st_mtime
+    # The source was edited after the variants were built
+    for suffix in ('.gz', '.br'):
+        os.utime(static_folder / f'script.js{suffix}', (mtime - 10, mtime - 10))
+
+    response = client.get('/script.js', headers={'Accept-Encoding': 'br, gzip'})
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+    assert response.data == source.read_bytes()
+
+
+def test_versioned_static_url_is_immutable(client, static_folder):
+    response = client.get('/script.js?v=abc', headers={'Accept-Encoding': 'gzip'})
+    assert response.cache_control.immutable
+    assert response.cache_control.max_age == compression.STATIC_MAX_AGE
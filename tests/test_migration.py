@@ -0,0 +1,113 @@
+import sqlite3
+import unicodedata
+
+import db
+from conftest import create_baseline_db, login
+
+# Alef with madda, precomposed and decomposed
+MADDA_NFC = 'آمن'
+MADDA_NFD = unicodedata.normalize('NFD', MADDA_NFC)
+
+
+def baseline_rows(path, user_id):
+    """Rows of a user as the baseline GET /api/words returned them (SELECT *)"""
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute(
+        'SELECT * FROM arabic_words WHERE user_id = ? ORDER BY timestamp DESC', (user_id,)
+    ).fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
+
+def set_timestamps(path):
+    """Distinct timestamps, so the list order does not depend on ties"""
+    conn = sqlite3.connect(path)
+    conn.execute("UPDATE arabic_words SET timestamp = datetime('2024-01-01', '+' || id || ' minutes')")
+    conn.commit()
+    conn.close()
+
+
+def test_keeps_ids_and_autoincrement_high_water_mark(database):
+    create_baseline_db(database, [
+        ('كتاب', 'book', 's1', 'u1'),
+        ('باب', 'door', 's1', 'u1'),
+        ('قمر', 'moon', 's1', 'u1'),
+        ('شمس', 'sun', 's1', 'u1'),
+    ])
+    # A deleted last row must not have its id reused
+    conn = sqlite3.connect(database)
+    conn.execute('DELETE FROM arabic_words WHERE id IN (2, 4)')
+    conn.commit()
+    conn.close()
+
+    db.init_db()
+
+    conn = db.get_db()
+    rows = conn.execute('''
+        SELECT w.id, l.word FROM arabic_words w JOIN lexicon l ON l.id = w.lexicon_id ORDER BY w.id
+    ''').fetchall()
+    assert [(row['id'], row['word']) for row in rows] == [(1, 'كتاب'), (3, 'قمر')]
+    assert conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'arabic_words'").fetchone()[0] == 4
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'arabic_words_old'").fetchone()[0] == 0
+
+    db.insert_words(conn.cursor(), 'u1', 's1', [{'word': 'نجم'}], 1)
+    assert conn.execute('SELECT MAX(id) FROM arabic_words').fetchone()[0] == 5
+    conn.close()
+
+
+def test_merges_words_differing_only_by_whitespace_and_normalization(database):
+    create_baseline_db(database, [
+        (MADDA_NFC, 'safe', 's1', 'u1'),
+        (f'  {MADDA_NFD} ', 'secure', 's1', 'u2'),
+        ('كتاب  جديد', 'new book', 's1', 'u1'),
+        ('كتاب جديد', 'a new book', 's2', 'u1'),
+    ])
+
+    db.init_db()
+
+    conn = db.get_db()
+    entries = conn.execute('SELECT word, translation FROM lexicon ORDER BY id').fetchall()
+    # The first saved copy wins
+    assert [tuple(entry) for entry in entries] == [(MADDA_NFC, 'safe'), ('كتاب جديد', 'new book')]
+    assert conn.execute('SELECT COUNT(*) FROM arabic_words').fetchone()[0] == 4
+    conn.close()
+
+
+def test_migrates_rows_without_user_id(database):
+    create_baseline_db(database, [
+        ('كتاب', 'book', 's1', None),
+        ('باب', 'door', 's1', 'u1'),
+    ])
+
+    db.init_db()
+
+    conn = db.get_db()
+    row = conn.execute('''
+        SELECT w.id, w.user_id, l.word, l.translation
+        FROM arabic_words w JOIN lexicon l ON l.id = w.lexicon_id
+        WHERE w.user_id IS NULL
+    ''').fetchone()
+    assert tuple(row) == (1, None, 'كتاب', 'book')
+    conn.close()
+
+
+def test_word_list_json_is_unchanged(database, client):
+    create_baseline_db(database, [
+        ('كتاب', 'book', 's1', 'u1'),
+        ('باب', 'door', 's2', 'u1'),
+        ('قمر', 'moon', 's1', 'u2'),
+        ('شمس', 'sun', 's1', 'u1'),
+    ])
+    set_timestamps(database)
+    expected = baseline_rows(database, 'u1')
+
+    db.init_db()
+    login(client, 'u1')
+    result = client.get('/api/words?limit=10').get_json()
+
+    assert result['words'] == expected
+    assert (result['total'], result['page'], result['per_page']) == (3, 1, 10)
+
+    session_words = client.get('/api/words?sessionId=s1').get_json()['words']
+    assert session_words == [word for word in expected if word['session_id'] == 's1']
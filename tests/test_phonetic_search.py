@@ -0,0 +1,116 @@
+import random
+
+import pytest
+
+import backfill
+import db
+import phonetic_search
+import text
+from conftest import create_baseline_db, login, save_words
+
+
+def ids(phonemes):
+    return text.tokens_to_ids(phonemes.split())
+
+
+@pytest.fixture
+def save_lexicon(database):
+    """Save words for u1 straight from phoneme strings"""
+    db.init_db()
+    conn = db.get_db()
+    cursor = conn.cursor()
+
+    def save_lexicon(*phoneme_strings, user_id='u1'):
+        lexicon_ids = {}
+        for phonemes in phoneme_strings:
+            token_ids = ' '.join(map(str, ids(phonemes)))
+            cursor.execute('INSERT INTO lexicon (word, phonemes, token_ids) VALUES (?, ?, ?)',
+                           (phonemes, phonemes, token_ids))
+            lexicon_id = cursor.lastrowid
+            cursor.execute('INSERT INTO arabic_words (lexicon_id, user_id) VALUES (?, ?)', (lexicon_id, user_id))
+            phonetic_search.index_rows(cursor, [(lexicon_id, token_ids)])
+            lexicon_ids[phonemes] = lexicon_id
+        conn.commit()
+        return lexicon_ids
+
+    yield save_lexicon, cursor
+    conn.close()
+
+
+def levenshtein(a, b):
+    row = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        diagonal, row[0] = row[0], i
+        for j, y in enumerate(b, 1):
+            diagonal, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, diagonal + (x != y))
+    return row[-1]
+
+
+def test_bounded_edit_distance_matches_levenshtein():
+    rng = random.Random(0)
+    for _ in range(5000):
+        a = [rng.randint(0, 4) for _ in range(rng.randint(0, 8))]
+        b = [rng.randint(0, 4) for _ in range(rng.randint(0, 8))]
+        bound = rng.randint(0, 5)
+        distance = levenshtein(a, b)
+        assert phonetic_search.bounded_edit_distance(a, b, bound) == (distance if distance <= bound else None)
+
+
+def test_closest_words_first(save_lexicon):
+    save, cursor = save_lexicon
+    lexicon_ids = save('k i t aa b', 'k aa t i b', 'm a k t a b', '$ a m s')
+
+    matches = phonetic_search.find_similar(cursor, 'u1', ids('k i t aa b'), max_distance=2)
+
+    assert matches == [(lexicon_ids['k i t aa b'], 0), (lexicon_ids['k aa t i b'], 2)]
+
+
+def test_short_word_differing_in_one_phoneme_is_found(save_lexicon):
+    save, cursor = save_lexicon
+    lexicon_ids = save('b aa', 'm i')
+
+    # Shares no trigram with "b aa", only the leading bigram
+    matches = phonetic_search.find_similar(cursor, 'u1', ids('b a'), max_distance=1)
+
+    assert matches == [(lexicon_ids['b aa'], 1)]
+
+
+def test_only_the_users_words_are_searched(save_lexicon):
+    save, cursor = save_lexicon
+    save('k i t aa b', user_id='u2')
+
+    assert phonetic_search.find_similar(cursor, 'u1', ids('k i t aa b')) == []
+
+
+def test_no_matches_for_zero_limit(save_lexicon):
+    save, cursor = save_lexicon
+    save('k i t aa b')
+
+    assert phonetic_search.find_similar(cursor, 'u1', ids('k i t aa b'), limit=0) == []
+
+
+def test_similar_endpoint_clamps_limit(database, client):
+    db.init_db()
+    login(client, 'u1')
+    save_words(client, ['كتاب'])
+
+    for limit in (0, -5):
+        response = client.get('/api/words/similar', query_string={'word': 'كتاب', 'limit': limit})
+        assert response.status_code == 200
+        assert [word['word'] for word in response.get_json()['words']] == ['كتاب']
+
+
+def test_similar_endpoint_reflects_backfilled_index(database, client):
+    create_baseline_db(database, [('كِتَاب', 'book', 's1', 'u1')])
+    db.init_db()
+    login(client, 'u1')
+
+    first = client.get('/api/words/similar', query_string={'word': 'كِتَاب'})
+    assert first.get_json()['words'] == []
+
+    backfill.run_backfill(workers=1)
+
+    headers = {'If-None-Match': first.headers['ETag']} if 'ETag' in first.headers else {}
+    second = client.get('/api/words/similar', query_string={'word': 'كِتَاب'}, headers=headers)
+    assert second.status_code == 200
+    assert [word['word'] for word in second.get_json()['words']] == ['كِتَاب']
@@ -0,0 +1,107 @@
+import threading
+import time
+
+import pytest
+
+import db
+import ratelimit
+from app import get_openai
+
+
+@pytest.fixture
+def make_budget(database):
+    """Budgets built like one per worker process, sharing the database"""
+    db.init_db()
+
+    def make_budget(**limits):
+        settings = dict(user_rate_per_min=60, user_burst=100, global_rate_per_min=60, global_burst=100,
+                        max_inflight=100, max_queue=10, queue_timeout=0.2)
+        settings.update(limits)
+        return ratelimit.LLMBudget(**settings)
+    return make_budget
+
+
+def acquire(budget, user_id):
+    try:
+        return budget.acquire(user_id)
+    except ratelimit.RateLimited as e:
+        return e.reason
+
+
+def test_global_bucket_is_shared_between_workers(make_budget):
+    workers = [make_budget(global_burst=3), make_budget(global_burst=3)]
+
+    results = [acquire(workers[i % 2], f'user{i}') for i in range(4)]
+
+    assert results[3] == 'global_rate'
+    assert all(isinstance(result, int) for result in results[:3])
+
+
+def test_user_bucket_is_shared_between_workers(make_budget):
+    workers = [make_budget(user_burst=1), make_budget(user_burst=1)]
+
+    assert isinstance(acquire(workers[0], 'u1'), int)
+    assert acquire(workers[1], 'u1') == 'user_rate'
+    assert isinstance(acquire(workers[1], 'u2'), int)
+
+
+def test_rejected_call_does_not_use_up_the_global_bucket(make_budget):
+    budget = make_budget(user_burst=1, global_burst=2)
+
+    acquire(budget, 'u1')
+    assert acquire(budget, 'u1') == 'user_rate'
+    assert isinstance(acquire(budget, 'u2'), int)
+
+
+def test_inflight_cap_is_shared_between_workers(make_budget):
+    workers = [make_budget(max_inflight=1), make_budget(max_inflight=1)]
+
+    slot_id = workers[0].acquire('u1')
+    assert acquire(workers[1], 'u2') == 'queue_timeout'
+
+    workers[0].release(slot_id)
+    assert isinstance(acquire(workers[1], 'u2'), int)
+
+
+def test_queued_call_gets_slot_released_by_another_worker(make_budget):
+    workers = [make_budget(max_inflight=1, queue_timeout=5), make_budget(max_inflight=1, queue_timeout=5)]
+    slot_id = workers[0].acquire('u1')
+
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(acquire(workers[1], 'u2')))
+    waiter.start()
+    workers[0].release(slot_id)
+    waiter.join()
+
+    assert isinstance(results[0], int)
+
+
+def test_slots_of_crashed_workers_expire(make_budget, monkeypatch):
+    budget = make_budget(max_inflight=1)
+    budget.acquire('u1')
+
+    monkeypatch.setattr(ratelimit, 'SLOT_TTL', 0)
+    assert isinstance(acquire(budget, 'u2'), int)
+
+
+def test_busy_poll_does_not_take_the_write_lock(make_budget):
+    budget = make_budget(max_inflight=1)
+    budget.acquire('u1')
+
+    # A save holding the write lock must not stall (or be stalled by) a poll
+    conn = db.get_db()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        start = time.monotonic()
+        assert budget._take_slot() is None
+        assert time.monotonic() - start < 1
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+def test_openai_calls_end_before_their_slot_expires(app, monkeypatch):
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    with app.app_context():
+        client = get_openai()
+    assert (client.max_retries + 1) * client.timeout < ratelimit.SLOT_TTL
@@ -0,0 +1,61 @@
+import db
+from conftest import create_baseline_db, login, save_words
+
+
+def test_delete_all_with_rows_missing_user_id(database, client):
+    create_baseline_db(database, [
+        ('كتاب', 'book', 's1', None),
+        ('باب', 'door', 's1', 'u1'),
+    ])
+    db.init_db()
+    login(client, 'u1')
+
+    response = client.delete('/api/words')
+    assert response.status_code == 200
+
+    conn = db.get_db()
+    assert conn.execute('SELECT COUNT(*) FROM arabic_words').fetchone()[0] == 0
+    assert conn.execute('SELECT COUNT(*) FROM data_versions WHERE scope IS NULL').fetchone()[0] == 0
+    conn.close()
+
+
+def test_delete_session_with_rows_missing_user_id(database, client):
+    create_baseline_db(database, [('كتاب', 'book', 's1', None)])
+    db.init_db()
+    login(client, 'u1')
+    save_words(client, ['قمر'], session_id='s1')
+
+    response = client.delete('/api/words?sessionId=s1')
+    assert response.status_code == 200
+
+    changes = client.get('/api/words/changes?since=0').get_json()
+    assert changes['inserted'] == []
+
+
+def test_filling_a_shared_entry_invalidates_other_users_lists(database, client):
+    db.init_db()
+    login(client, 'u1')
+    assert client.post('/api/words', json={'words': [{'word': 'كتاب'}]}).status_code == 200
+    first = client.get('/api/words')
+    assert first.get_json()['words'][0]['translation'] == ''
+
+    login(client, 'u2')
+    save_words(client, ['كتاب'])
+
+    login(client, 'u1')
+    second = client.get('/api/words', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200
+    assert second.get_json()['words'][0]['translation'] == 'كتاب-en'
+
+
+def test_saving_an_existing_entry_unchanged_keeps_other_users_etags(database, client):
+    db.init_db()
+    login(client, 'u1')
+    save_words(client, ['كتاب'])
+    first = client.get('/api/words')
+
+    login(client, 'u2')
+    save_words(client, ['كتاب'])
+
+    login(client, 'u1')
+    assert client.get('/api/words', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
@@ -0,0 +1,59 @@
+import threading
+
+import pytest
+
+import db
+import writebehind
+
+
+@pytest.fixture
+def write_queue(database):
+    db.init_db()
+    write_queue = writebehind.WriteBehindQueue(max_rows=100, max_delay=0.2)
+    yield write_queue
+    write_queue.close()
+
+
+def saved_words(user_id):
+    conn = db.get_db()
+    rows = conn.execute('''
+        SELECT l.word FROM arabic_words w JOIN lexicon l ON l.id = w.lexicon_id
+        WHERE w.user_id = ? ORDER BY w.id
+    ''', (user_id,)).fetchall()
+    conn.close()
+    return [row['word'] for row in rows]
+
+
+def test_bad_save_only_fails_its_own_request(write_queue):
+    saves = {
+        'u1': [{'word': 'كتاب', 'translation': 'book'}],
+        'u2': [{'word': 'باب', 'translation': {'not': 'a string'}}],
+        'u3': [{'word': 'قمر', 'translation': 'moon'}],
+    }
+    errors = {}
+
+    def submit(user_id):
+        try:
+            write_queue.submit(user_id, 's1', saves[user_id])
+        except Exception as e:
+            errors[user_id] = e
+
+    threads = [threading.Thread(target=submit, args=(user_id,)) for user_id in saves]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert list(errors) == ['u2']
+    assert saved_words('u1') == ['كتاب']
+    assert saved_words('u2') == []
+    assert saved_words('u3') == ['قمر']
+
+
+def test_timed_out_save_is_cancelled(write_queue):
+    with pytest.raises(writebehind.CommitTimeout):
+        write_queue.submit('u1', 's1', [{'word': 'كتاب'}], timeout=0.01)
+
+    # Let the writer reach the batch deadline, then flush a save behind it
+    write_queue.submit('u1', 's1', [{'word': 'قمر'}])
+    assert saved_words('u1') == ['قمر']
@@ -0,0 +1,177 @@
+import atexit
+import os
+import queue
+import threading
+import time
+
+import db
+import metrics
+
+# Wait this long for a batch commit before giving up on a request
+COMMIT_TIMEOUT = float(os.getenv('WRITE_BEHIND_TIMEOUT', 30))
+
+
+class CommitTimeout(Exception):
+    """Raised when a save was not committed within COMMIT_TIMEOUT
+
+    The save is cancelled before this is raised, so it is safe to retry.
+    """
+
+
+def enabled():
+    """Whether saves go through the write-behind queue (WRITE_BEHIND=1)"""
+    return os.getenv('WRITE_BEHIND') == '1'
+
+
+class PendingSave:
+    """One request's words, acknowledged once their batch commits"""
+
+    def __init__(self, user_id, session_id, words_data):
+        self.user_id = user_id
+        self.session_id = session_id
+        self.words_data = words_data
+        self.rows = sum(1 for item in words_data if item.get('word', '').strip())
+        self.done = threading.Event()
+        self.error = None
+        # Set under WriteBehindQueue._claim_lock: exactly one of them wins
+        self.claimed = False
+        self.cancelled = False
+
+
+class WriteBehindQueue:
+    """In-process queue flushed by one writer thread in group commits
+
+    A batch is committed when it holds `max_rows` rows or `max_delay`
+    seconds after its first save arrived, whichever comes first, so a
+    burst of saves shares one transaction (and one fsync).
+    """
+
+    def __init__(self, max_rows, max_delay):
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.queue = queue.Queue()
+        self._claim_lock = threading.Lock()
+        self._closing = False
+        self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self._thread.start()
+
+    def submit(self, user_id, session_id, words_data, timeout=COMMIT_TIMEOUT):
+        """Queue words and block until they are committed"""
+        if self._closing:
+            raise RuntimeError('Write-behind queue is shutting down')
+
+        pending = PendingSave(user_id, session_id, words_data)
+        self.queue.put(pending)
+        metrics.WRITE_QUEUE_DEPTH.inc(pending.rows)
+
+        if not pending.done.wait(timeout):
+            with self._claim_lock:
+                if not pending.claimed:
+                    pending.cancelled = True
+                    raise CommitTimeout()
+            # Already part of a transaction: its outcome is moments away
+            pending.done.wait()
+        if pending.error:
+            raise pending.error
+
+    def _next_batch(self):
+        """Block for the first save, then gather more until the batch is full or due"""
+        batch = [self.queue.get()]
+        if batch[0] is None:
+            return []
+        rows = batch[0].rows
+        deadline = time.monotonic() + self.max_delay
+
+        while rows < self.max_rows:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                pending = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if pending is None:
+                # Shutdown sentinel: commit what we have, then stop
+                self.queue.put(None)
+                break
+            batch.append(pending)
+            rows += pending.rows
+        return batch
+
+    def _claim(self, batch):
+        """Keep the saves that have not timed out, so they can no longer be cancelled"""
+        with self._claim_lock:
+            for pending in batch:
+                pending.claimed = not pending.cancelled
+        return [pending for pending in batch if pending.claimed]
+
+    def _commit(self, batch):
+        queued_rows = sum(pending.rows for pending in batch)
+        batch = self._claim(batch)
+        if not batch:
+            metrics.WRITE_QUEUE_DEPTH.dec(queued_rows)
+            return
+        rows = 0
+        start = time.perf_counter()
+        conn = db.get_db()
+        try:
+            cursor = conn.cursor()
+            versions = db.bump_data_version(cursor, [pending.user_id for pending in batch])
+            for pending in batch:
+                # A bad save only fails its own request, not the whole group
+                cursor.execute('SAVEPOINT pending_save')
+                try:
+                    db.insert_words(cursor, pending.user_id, pending.session_id, pending.words_data,
+                                    versions[pending.user_id])
+                    rows += pending.rows
+                except Exception as e:
+                    cursor.execute('ROLLBACK TO pending_save')
+                    print(f"Write-behind save error: {e}")
+                    pending.error = e
+                cursor.execute('RELEASE pending_save')
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"Write-behind commit error: {e}")
+            for pending in batch:
+                pending.error = e
+        finally:
+            conn.close()
+            metrics.WRITE_QUEUE_DEPTH.dec(queued_rows)
+            metrics.WRITE_BATCH_ROWS.observe(rows)
+            metrics.WRITE_COMMIT_LATENCY.observe(time.perf_counter() - start)
+            for pending in batch:
+                pending.done.set()
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            self._commit(batch)
+
+    def close(self):
+        """Stop accepting saves and drain everything already queued"""
+        if self._closing:
+            return
+        self._closing = True
+        self.queue.put(None)
+        self._thread.join()
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    """Get the write-behind queue, starting its writer on first use (after any fork)"""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = WriteBehindQueue(
+                    max_rows=int(os.getenv('WRITE_BEHIND_MAX_ROWS', 200)),
+                    max_delay=float(os.getenv('WRITE_BEHIND_MAX_DELAY_MS', 20)) / 1000,
+                )
+                atexit.register(_queue.close)
+    return _queue
@@ -0,0 +1,19 @@
+"""Production entry point
+
+Run migrations once per deploy, then start any number of workers:
+
+    flask --app app init-db
+    gunicorn --workers 4 --bind 0.0.0.0:5000 wsgi:app
+
+Each worker only builds the Flask app on import; the database, the
+OpenAI client and the Auth0 client are touched on first use. For
+aggregated /metrics across workers, point PROMETHEUS_MULTIPROC_DIR at an
+empty directory before starting gunicorn.
+
+The LLM_* translation limits are enforced across all workers: the token
+buckets and in-flight slots live in the database, so configure them for
+the whole deployment, not per worker.
+"""
+from app import create_app
+
+app = create_app()